@@ -0,0 +1,139 @@
+"""
+语音识别服务 - 会议纪要生成神器
+常驻进程持有语音识别模型，界面、命令行和脚本通过本地连接共享同一个已加载的模型
+
+用法: python asr_server.py
+客户端：在 config.json 中设置 "asr_server_enabled": true，SpeechRecognizer 会把识别请求发送到本服务
+"""
+
+import os
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client, Connection
+from multiprocessing import AuthenticationError
+from pathlib import Path
+from typing import Tuple, Dict, Any
+
+from config import config
+
+def server_address() -> Tuple[str, int]:
+    """获取服务监听地址（仅本机）"""
+    port = config.get("asr_server_port", 50817) or 50817
+    return ("127.0.0.1", int(port))
+
+def authkey_path() -> Path:
+    """获取连接密钥文件路径（服务启动时生成，客户端读取）"""
+    log_dir = config.get("log_dir", "logs") or "logs"
+    return Path(log_dir) / "asr_server.key"
+
+def connect_to_server() -> Connection:
+    """
+    连接语音识别服务
+
+    Returns:
+        已通过认证的连接
+
+    Raises:
+        OSError: 服务未启动或密钥文件不存在
+    """
+    authkey = authkey_path().read_bytes()
+    return Client(server_address(), authkey=authkey)
+
+class ASRServer:
+    """语音识别服务类"""
+
+    def __init__(self):
+        # 延迟导入：speech_recognition在客户端模式下会导入本模块
+        from speech_recognition import SpeechRecognizer
+        self.recognizer = SpeechRecognizer(use_server=False)
+        # 同一时刻只运行一个识别任务，避免多个请求争抢同一模型
+        self._recognize_lock = threading.Lock()
+
+    def serve_forever(self) -> None:
+        """加载模型并持续接受客户端连接"""
+        self.recognizer.initialize_model(lambda message, progress: print(message))
+
+        authkey = secrets.token_bytes(32)
+        key_file = authkey_path()
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        key_file.write_bytes(authkey)
+        try:
+            os.chmod(key_file, 0o600)
+        except OSError:
+            pass
+
+        address = server_address()
+        with Listener(address, authkey=authkey) as listener:
+            print(f"语音识别服务已启动: {address[0]}:{address[1]}（设备: {self.recognizer.device}）")
+            while True:
+                try:
+                    conn = listener.accept()
+                except AuthenticationError:
+                    print("拒绝未通过认证的连接")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn: Connection) -> None:
+        """处理单个客户端连接上的请求，直到客户端断开"""
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    break
+                try:
+                    conn.send(self._dispatch(conn, request))
+                except Exception as e:
+                    conn.send({"type": "error", "error": str(e)})
+        except (OSError, EOFError) as e:
+            print(f"客户端连接中断: {e}")
+        finally:
+            conn.close()
+
+    def _dispatch(self, conn: Connection, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行客户端请求
+
+        Args:
+            conn: 客户端连接（用于回传进度）
+            request: 请求字典，command为 recognize / info / ping
+
+        Returns:
+            响应字典
+        """
+        command = request.get("command")
+        if command == "ping":
+            return {"type": "result", "pid": os.getpid()}
+        if command == "info":
+            return {"type": "result", "info": self.recognizer.get_model_info()}
+        if command != "recognize":
+            raise Exception(f"未知命令: {command}")
+
+        audio = request.get("path")
+        if audio is None:
+            audio = request["pcm"]
+
+        def send_progress(message: str, progress: float) -> None:
+            conn.send({"type": "progress", "message": message, "progress": progress})
+
+        def send_segment(segment: Dict[str, Any]) -> None:
+            conn.send({"type": "segment", "segment": segment})
+
+        segment_callback = send_segment if request.get("stream_segments") else None
+
+        if self._recognize_lock.locked():
+            send_progress("识别服务正在处理其他请求，排队中...", 0.0)
+        with self._recognize_lock:
+            text = self.recognizer.recognize_audio(audio, send_progress, segment_callback)
+            stats = dict(self.recognizer.last_recognition_stats)
+        return {"type": "result", "text": text, "stats": stats}
+
+def main():
+    """主函数"""
+    try:
+        ASRServer().serve_forever()
+    except KeyboardInterrupt:
+        print("语音识别服务已停止")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+音频指纹模块 - 会议纪要生成神器
+用于识别重复上传的同一段录音（不同设备副本、不同封装格式的重新导出），复用已有识别结果
+"""
+
+import json
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+from scipy import fft as scipy_fft
+from scipy.signal import resample_poly
+
+from config import config
+
+# 指纹参数：降采样到4kHz，每帧256ms、帧移64ms（每秒约16个子指纹），
+# 在300-2000Hz内划分33个对数频带，每帧生成32位子指纹
+FINGERPRINT_SAMPLE_RATE = 4000
+FRAME_SIZE = 1024
+HOP_SIZE = 256
+BAND_COUNT = 33
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+# 匹配时查询录音额外计算的帧移相位数：起点错开帧移的1/4、2/4、3/4，任意起点的两份副本都能对齐到8ms以内
+PHASE_COUNT = 4
+# 指纹格式版本，帧参数变化后旧索引条目不再参与匹配
+FINGERPRINT_VERSION = 3
+
+def compute_fingerprint(samples: np.ndarray, sample_rate: int, offset: int = 0,
+                        max_frames: Optional[int] = None) -> np.ndarray:
+    """
+    计算音频指纹：相邻频带能量差在时间上的变化符号（每帧32位）
+
+    Args:
+        samples: float32 单声道PCM数组
+        sample_rate: 采样率（需为4000的整数倍）
+        offset: 第一帧的起点（降采样后的样本数），用于计算错开帧移相位的指纹
+        max_frames: 最多输出的子指纹数（None表示到结尾）
+
+    Returns:
+        uint32指纹数组，每个元素对应一帧
+    """
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    factor = max(1, sample_rate // FINGERPRINT_SAMPLE_RATE)
+    decimated_length = samples.shape[0] // factor
+    available = decimated_length - offset
+    frame_count = (available - FRAME_SIZE) // HOP_SIZE + 1 if available >= FRAME_SIZE else 0
+    if max_frames is not None:
+        frame_count = min(frame_count, max_frames + 1)
+    if frame_count < 2:
+        return np.zeros(0, dtype=np.uint32)
+
+    # 频带边界（按rfft频点索引）
+    edges_hz = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, BAND_COUNT + 1)
+    edges = np.round(edges_hz / FINGERPRINT_SAMPLE_RATE * FRAME_SIZE).astype(int)
+    edges = np.maximum.accumulate(np.maximum(edges, np.arange(BAND_COUNT + 1) + edges[0]))
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+
+    # 分段计算频带能量，限制临时数组大小
+    band_energy = np.empty((frame_count, BAND_COUNT), dtype=np.float32)
+    frames_per_chunk = 2048
+    # 分段降采样时两侧多取的样本数（降采样后），避免滤波器在分段边界处的边缘效应
+    margin = 64
+    for first in range(0, frame_count, frames_per_chunk):
+        last = min(first + frames_per_chunk, frame_count)
+        begin = offset + first * HOP_SIZE
+        end = offset + (last - 1) * HOP_SIZE + FRAME_SIZE
+        low, high = max(0, begin - margin), min(decimated_length, end + margin)
+        chunk = np.asarray(samples[low * factor:high * factor], dtype=np.float32)
+        # 抗混叠滤波后降采样（简单的块均值会让2kHz以上的成分随采样相位不同混叠到指纹频带），再按帧移取重叠帧（视图，不复制）
+        if factor > 1:
+            chunk = resample_poly(chunk, 1, factor)
+        decimated = np.ascontiguousarray(chunk[begin - low:end - low], dtype=np.float32)
+        step = decimated.strides[0]
+        frames = np.lib.stride_tricks.as_strided(decimated, shape=(last - first, FRAME_SIZE), strides=(HOP_SIZE * step, step))
+        # scipy.fft保持float32计算，只保留指纹频带内的频点
+        spectrum = np.asarray(scipy_fft.rfft(frames * window, axis=1))[:, edges[0]:edges[-1]]
+        power = np.real(spectrum) ** 2 + np.imag(spectrum) ** 2
+        band_energy[first:last] = np.add.reduceat(power, edges[:-1] - edges[0], axis=1)
+
+    band_diff = band_energy[:, :-1] - band_energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = (1 << np.arange(BAND_COUNT - 1, dtype=np.uint64)).astype(np.uint64)
+    return (bits.astype(np.uint64) @ weights).astype(np.uint32)
+
+def bit_error_rate(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    计算两段等长指纹的误码率
+    两边均为0的帧（数字静音或稳定不变的声音）不携带信息，不参与计算，避免静音较多的不同录音被误判为重复
+    """
+    informative = (first != 0) | (second != 0)
+    frame_count = int(np.count_nonzero(informative))
+    if frame_count == 0:
+        return 1.0
+    differing = np.unpackbits(np.bitwise_xor(first[informative], second[informative]).view(np.uint8)).sum()
+    return float(differing) / (frame_count * 32)
+
+class FingerprintIndex:
+    """录音指纹索引类"""
+
+    def __init__(self, index_dir: Optional[str] = None):
+        """
+        初始化指纹索引
+
+        Args:
+            index_dir: 索引目录，如果为None则使用日志目录下的fingerprints
+        """
+        config_log_dir = config.get("log_dir", "logs")
+        if config_log_dir is None:
+            config_log_dir = "logs"
+        self.index_dir = Path(index_dir) if index_dir is not None else Path(config_log_dir) / "fingerprints"
+        self.index_file = self.index_dir / "index.json"
+
+        max_entries = config.get("fingerprint_index_max_entries", 500)
+        self.max_entries = max_entries if max_entries is not None else 500
+        max_bytes = config.get("fingerprint_index_max_bytes", 64 * 1024 * 1024)
+        self.max_bytes = max_bytes if max_bytes is not None else 64 * 1024 * 1024
+
+        # 匹配阈值：误码率低于该值视为同一录音
+        self.match_threshold = 0.2
+        # 对齐搜索范围（帧），约±6.4秒
+        self.max_shift_frames = int(6.4 * FINGERPRINT_SAMPLE_RATE / HOP_SIZE)
+        # 对齐搜索使用的开头片段长度（帧），约64秒
+        self.probe_frames = 1000
+
+        self._lock = threading.Lock()
+
+    def find_match(self, fingerprint: np.ndarray, duration: float, settings: Dict[str, Any],
+                   samples: Optional[np.ndarray] = None, sample_rate: int = 16000) -> Optional[Dict[str, Any]]:
+        """
+        查找与指纹匹配且识别参数相同的已识别录音
+
+        Args:
+            fingerprint: compute_fingerprint计算的指纹
+            duration: 音频时长（秒）
+            settings: 当前识别参数
+            samples: 计算指纹的PCM数组（可选，提供时额外按错开帧移的相位对齐，起点不同的副本匹配更准确）
+            sample_rate: samples的采样率
+
+        Returns:
+            匹配的索引条目（含transcript字段），没有匹配时返回None
+        """
+        if fingerprint.size == 0:
+            return None
+        with self._lock:
+            entries = self._load_entries()
+        # 各相位的查询指纹，有候选条目时才计算：相位0为完整指纹，其余相位先只计算开头片段
+        phases: Dict[int, np.ndarray] = {0: fingerprint}
+        for entry in entries:
+            if entry.get("settings") != settings or entry.get("version") != FINGERPRINT_VERSION:
+                continue
+            # 时长相差过大的录音不可能是同一段
+            if abs(entry.get("duration", 0) - duration) > max(5.0, duration * 0.02):
+                continue
+            try:
+                stored = np.load(str(self.index_dir / f"{entry['id']}.npy"))
+                if samples is not None and len(phases) == 1:
+                    step = HOP_SIZE // PHASE_COUNT
+                    probe_frames = self.probe_frames + self.max_shift_frames
+                    for phase in range(1, PHASE_COUNT):
+                        phases[phase] = compute_fingerprint(samples, sample_rate, offset=phase * step, max_frames=probe_frames)
+                phase, shift, probe_rate = self._align(phases, stored)
+                if probe_rate >= self.match_threshold:
+                    continue
+                query = fingerprint
+                if phase != 0 and samples is not None:
+                    # 开头片段已匹配，再计算该相位的完整指纹核对整段
+                    query = compute_fingerprint(samples, sample_rate, offset=phase * (HOP_SIZE // PHASE_COUNT))
+                error_rate = self._overlap_error_rate(query, stored, shift)
+                if error_rate < self.match_threshold:
+                    transcript = (self.index_dir / f"{entry['id']}.txt").read_text(encoding='utf-8')
+                    print(f"检测到重复录音（误码率 {error_rate:.3f}），复用 {entry.get('source', '')} 的识别结果")
+                    return dict(entry, transcript=transcript)
+            except Exception as e:
+                print(f"读取指纹条目失败: {e}")
+        return None
+
+    def add(self, fingerprint: np.ndarray, duration: float, settings: Dict[str, Any],
+            transcript: str, source: Optional[str] = None) -> None:
+        """
+        记录已识别录音的指纹和识别结果
+
+        Args:
+            fingerprint: compute_fingerprint计算的指纹
+            duration: 音频时长（秒）
+            settings: 识别参数
+            transcript: 识别结果文本
+            source: 来源文件路径（仅用于展示）
+        """
+        if fingerprint.size == 0:
+            return
+        entry_id = uuid.uuid4().hex
+        try:
+            with self._lock:
+                self.index_dir.mkdir(parents=True, exist_ok=True)
+                np.save(str(self.index_dir / f"{entry_id}.npy"), fingerprint)
+                (self.index_dir / f"{entry_id}.txt").write_text(transcript, encoding='utf-8')
+                entries = self._load_entries()
+                entries.insert(0, {
+                    "id": entry_id,
+                    "source": source,
+                    "duration": duration,
+                    "settings": settings,
+                    "version": FINGERPRINT_VERSION,
+                    "bytes": self._entry_bytes(entry_id),
+                    "timestamp": datetime.now().isoformat()
+                })
+                # 条目数或总大小超出上限时删除最旧的条目（最新条目始终保留）
+                kept = 1
+                total_bytes = entries[0]["bytes"]
+                for entry in entries[1:]:
+                    if kept >= self.max_entries:
+                        break
+                    entry_bytes = entry.get("bytes")
+                    if entry_bytes is None:
+                        entry_bytes = self._entry_bytes(entry["id"])
+                    if total_bytes + entry_bytes > self.max_bytes:
+                        break
+                    total_bytes += entry_bytes
+                    kept += 1
+                for stale in entries[kept:]:
+                    for suffix in (".npy", ".txt"):
+                        (self.index_dir / f"{stale['id']}{suffix}").unlink(missing_ok=True)
+                self._save_entries(entries[:kept])
+        except Exception as e:
+            print(f"保存录音指纹失败: {e}")
+
+    def _align(self, phases: Dict[int, np.ndarray], stored: np.ndarray):
+        """
+        在对齐搜索范围内，用各相位查询指纹的开头片段找到最佳相位和偏移
+
+        Returns:
+            (相位, 偏移帧数, 开头片段的误码率)
+        """
+        best_phase, best_shift, best_rate = 0, 0, 1.0
+        for phase, query in phases.items():
+            probe_length = min(self.probe_frames, query.size, stored.size)
+            for shift in range(-self.max_shift_frames, self.max_shift_frames + 1):
+                query_start, stored_start = max(0, shift), max(0, -shift)
+                length = min(probe_length, query.size - query_start, stored.size - stored_start)
+                if length < probe_length // 2:
+                    continue
+                rate = bit_error_rate(query[query_start:query_start + length], stored[stored_start:stored_start + length])
+                if rate < best_rate:
+                    best_phase, best_shift, best_rate = phase, shift, rate
+        return best_phase, best_shift, best_rate
+
+    def _overlap_error_rate(self, query: np.ndarray, stored: np.ndarray, shift: int) -> float:
+        """按偏移对齐后，返回整段重叠部分的误码率"""
+        query_start, stored_start = max(0, shift), max(0, -shift)
+        length = min(query.size - query_start, stored.size - stored_start)
+        if length <= 0:
+            return 1.0
+        return bit_error_rate(query[query_start:query_start + length], stored[stored_start:stored_start + length])
+
+    def _entry_bytes(self, entry_id: str) -> int:
+        """统计条目的指纹和识别结果文件大小"""
+        total = 0
+        for suffix in (".npy", ".txt"):
+            file_path = self.index_dir / f"{entry_id}{suffix}"
+            if file_path.exists():
+                total += file_path.stat().st_size
+        return total
+
+    def _load_entries(self) -> List[Dict[str, Any]]:
+        """读取索引条目"""
+        if not self.index_file.exists():
+            return []
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取指纹索引失败: {e}")
+            return []
+
+    def _save_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """写入索引条目"""
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+
+# 全局指纹索引实例
+fingerprint_index = FingerprintIndex()
@@ -5,14 +5,36 @@
 import os
 import subprocess
 import tempfile
+import threading
+import hashlib
+import bisect
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Dict, Any
+import numpy as np
 import ffmpeg
 from pydub import AudioSegment
-import librosa
 import soundfile as sf
 
 from config import config, SUPPORTED_AUDIO_FORMATS
+from temp_workspace import temp_workspace
+
+# 可直接流复制切分的音频编码：编码名 -> (分段文件扩展名, 分段封装格式)
+STREAM_COPY_FORMATS = {
+    'mp3': ('.mp3', 'mp3'),
+    'aac': ('.aac', 'adts'),
+    'flac': ('.flac', 'flac'),
+    'pcm_s16le': ('.wav', 'wav'),
+    'vorbis': ('.ogg', 'ogg'),
+    'opus': ('.ogg', 'ogg'),
+}
+
+# 可直接内存映射送入识别的WAV样本格式：soundfile子类型 -> NumPy数据类型
+MAPPABLE_WAV_SUBTYPES = {
+    'PCM_16': '<i2',
+    'FLOAT': '<f4',
+}
 
 class AudioProcessor:
     """音频处理类"""
@@ -24,6 +46,20 @@ class AudioProcessor:
         self.temp_dir = Path(temp_dir_str)
         self.temp_dir.mkdir(exist_ok=True)
         
+        # ffprobe结果缓存：键为(绝对路径, 文件大小, 修改时间)，按LRU淘汰
+        probe_cache_size = config.get("probe_cache_size", 256)
+        self.probe_cache_size = probe_cache_size if probe_cache_size is not None else 256
+        self._probe_cache: "OrderedDict[Tuple[str, int, int], dict]" = OrderedDict()
+        self._probe_cache_lock = threading.Lock()
+        
+        # 文件内容哈希缓存，避免同一文件重复计算
+        self._hash_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        
+        # 解码PCM缓存：按内容哈希+采样率+声道数存储为.npy，按LRU淘汰
+        self.pcm_cache_dir = self.temp_dir / "pcm_cache"
+        pcm_cache_max_bytes = config.get("pcm_cache_max_bytes", 2 * 1024 * 1024 * 1024)
+        self.pcm_cache_max_bytes = pcm_cache_max_bytes if pcm_cache_max_bytes is not None else 2 * 1024 * 1024 * 1024
+        
     def validate_audio_file(self, file_path: str) -> Tuple[bool, str]:
         """
         验证音频文件
@@ -59,6 +95,35 @@ class AudioProcessor:
         
         return True, ""
     
+    def probe_audio(self, file_path: str) -> dict:
+        """
+        获取音频文件的ffprobe结果（带缓存，同一文件只探测一次）
+        
+        Args:
+            file_path: 音频文件路径
+            
+        Returns:
+            ffprobe结果字典
+        """
+        stat = os.stat(file_path)
+        cache_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        
+        with self._probe_cache_lock:
+            probe = self._probe_cache.get(cache_key)
+            if probe is not None:
+                self._probe_cache.move_to_end(cache_key)
+                return probe
+        
+        # 探测在锁外进行，避免阻塞其他文件的缓存读取
+        probe = ffmpeg.probe(file_path)
+        
+        with self._probe_cache_lock:
+            self._probe_cache[cache_key] = probe
+            self._probe_cache.move_to_end(cache_key)
+            while len(self._probe_cache) > self.probe_cache_size:
+                self._probe_cache.popitem(last=False)
+        return probe
+    
     def get_audio_duration(self, file_path: str) -> float:
         """
         获取音频时长
@@ -69,19 +134,81 @@ class AudioProcessor:
         Returns:
             音频时长（秒）
         """
+        duration, method = self.get_audio_duration_with_method(file_path)
+        if method not in ("ffprobe", "wav_header"):
+            print(f"ffprobe无法获取时长，已使用备用方法 {method}: {file_path}")
+        return duration
+    
+    def get_audio_duration_with_method(self, file_path: str) -> Tuple[float, str]:
+        """
+        获取音频时长及所使用的方法（备用方法均为常数内存）
+        
+        Args:
+            file_path: 音频文件路径
+            
+        Returns:
+            (音频时长（秒）, 方法名："wav_header" / "ffprobe" / "soundfile" / "ffmpeg_stream")
+        """
+        # 已符合识别格式的WAV只读取文件头，不调用ffprobe
+        ready_info = self._asr_ready_info(file_path)
+        if ready_info is not None:
+            return ready_info.frames / ready_info.samplerate, "wav_header"
+        
         try:
-            # 使用ffmpeg获取时长
-            probe = ffmpeg.probe(file_path)
-            duration = float(probe['format']['duration'])
-            return duration
+            # 使用ffmpeg获取时长（读取探测缓存）
+            probe = self.probe_audio(file_path)
+            return float(probe['format']['duration']), "ffprobe"
         except Exception as e:
-            # 备用方法：使用librosa
-            try:
-                y, sr = librosa.load(file_path, sr=None)
-                duration = len(y) / sr
-                return duration
-            except Exception:
-                raise Exception(f"无法获取音频时长: {str(e)}")
+            probe_error = e
+        
+        # 备用方法1：soundfile只读取文件头
+        try:
+            info = sf.info(file_path)
+            if info.samplerate > 0 and info.frames > 0:
+                return info.frames / info.samplerate, "soundfile"
+        except Exception:
+            pass
+        
+        # 备用方法2：ffmpeg流式解码并计数，不保留解码数据
+        try:
+            return self._count_stream_duration(file_path), "ffmpeg_stream"
+        except Exception:
+            raise Exception(f"无法获取音频时长: {str(probe_error)}")
+    
+    def _count_stream_duration(self, file_path: str, sample_rate: int = 8000) -> float:
+        """
+        流式解码为低采样率单声道PCM，仅统计样本数来计算时长
+        
+        Args:
+            file_path: 音频文件路径
+            sample_rate: 计数用采样率
+            
+        Returns:
+            音频时长（秒）
+        """
+        process = (
+            ffmpeg
+            .input(file_path)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+            .global_args('-nostdin', '-loglevel', 'error')
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+        total_bytes = 0
+        try:
+            while True:
+                chunk = process.stdout.read(64 * 1024)
+                if not chunk:
+                    break
+                total_bytes += len(chunk)
+            stderr = process.stderr.read()
+            return_code = process.wait()
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+        
+        if return_code != 0 or total_bytes == 0:
+            raise Exception(stderr.decode('utf-8', errors='ignore').strip() or "未解码到音频数据")
+        return total_bytes / 2 / sample_rate
     
     def convert_audio(self, input_path: str, output_path: Optional[str] = None) -> str:
         """
@@ -92,22 +219,22 @@ class AudioProcessor:
             output_path: 输出音频文件路径（可选）
             
         Returns:
-            转换后的音频文件路径
+            转换后的音频文件路径（未指定输出路径时，使用完毕后需调用release_temp_file释放）
         """
+        owns_job = output_path is None
         if output_path is None:
+            # 每次转换使用独立的任务目录，同名文件不会互相覆盖
             output_filename = f"converted_{Path(input_path).stem}.mp3"
-            output_path = str(self.temp_dir / output_filename)
+            output_path = str(temp_workspace.create_job("convert") / output_filename)
         
         try:
-            # 使用ffmpeg进行转换
-            stream = ffmpeg.input(input_path)
+            # 使用ffmpeg进行转换，只映射第一条音轨，不解码视频
+            stream = ffmpeg.input(input_path)['a:0']
             stream = ffmpeg.output(
                 stream, 
                 output_path,
-                acodec='mp3',
-                ar=config.get("audio_sample_rate", 16000),
-                ac=config.get("audio_channels", 1),
-                ab='128k'
+                vn=None,
+                **self._conversion_output_kwargs()
             )
             ffmpeg.run(stream, overwrite_output=True, quiet=True)
             
@@ -122,80 +249,862 @@ class AudioProcessor:
                 audio.export(output_path, format="mp3", bitrate="128k")
                 return output_path
             except Exception as pydub_error:
+                if owns_job:
+                    temp_workspace.release_job(output_path, remove=True)
                 raise Exception(f"音频转换失败: {str(e)}, 备用方法也失败: {str(pydub_error)}")
     
-    def normalize_audio(self, audio_path: str) -> str:
+    def extract_audio(self, input_path: str, output_path: Optional[str] = None) -> str:
         """
-        音频标准化处理
+        从视频等容器中只分离音轨（-vn，不解码视频）
+        音频编码可直接封装时流复制，否则转为目标采样率/声道数的PCM WAV
         
         Args:
-            audio_path: 音频文件路径
+            input_path: 输入文件路径
+            output_path: 输出音频文件路径（可选，扩展名由音频编码决定时请勿指定）
             
         Returns:
-            标准化后的音频文件路径
+            提取出的音频文件路径（未指定输出路径时，使用完毕后需调用release_temp_file释放）
         """
-        output_path = str(self.temp_dir / f"normalized_{Path(audio_path).name}")
+        codec = None
+        try:
+            audio_streams = [st for st in self.probe_audio(input_path)['streams'] if st.get('codec_type') == 'audio']
+            if not audio_streams:
+                raise Exception("文件中没有音频流")
+            codec = audio_streams[0].get('codec_name')
+        except Exception as e:
+            if "没有音频流" in str(e):
+                raise Exception(f"音轨提取失败: {str(e)}")
+            # 无法探测编码时直接转为PCM
+        
+        stem = Path(input_path).stem
+        job_dir = None
+        if codec in STREAM_COPY_FORMATS:
+            extension, container_format = STREAM_COPY_FORMATS[codec]
+            if output_path is None:
+                job_dir = temp_workspace.create_job("extract")
+                copy_path = str(job_dir / f"audio_{stem}{extension}")
+            else:
+                copy_path = output_path
+            try:
+                stream = ffmpeg.input(input_path)['a:0']
+                stream = ffmpeg.output(stream, copy_path, vn=None, acodec='copy', format=container_format)
+                ffmpeg.run(stream, overwrite_output=True, quiet=True)
+                return copy_path
+            except Exception as e:
+                print(f"音轨流复制失败，改为转码: {e}")
         
+        if output_path is None:
+            if job_dir is None:
+                job_dir = temp_workspace.create_job("extract")
+            output_path = str(job_dir / f"audio_{stem}.wav")
         try:
-            # 使用ffmpeg进行标准化
-            stream = ffmpeg.input(audio_path)
-            stream = ffmpeg.filter(stream, 'loudnorm')
-            stream = ffmpeg.output(stream, output_path, acodec='mp3')
+            stream = ffmpeg.input(input_path)['a:0']
+            stream = ffmpeg.output(
+                stream,
+                output_path,
+                vn=None,
+                acodec='pcm_s16le',
+                ar=config.get("audio_sample_rate", 16000),
+                ac=config.get("audio_channels", 1),
+                format='wav'
+            )
             ffmpeg.run(stream, overwrite_output=True, quiet=True)
-            
             return output_path
+        except Exception as e:
+            if job_dir is not None:
+                temp_workspace.release_job(job_dir, remove=True)
+            raise Exception(f"音轨提取失败: {str(e)}")
+    
+    def _conversion_output_kwargs(self) -> Dict[str, Any]:
+        """转码输出参数"""
+        return {
+            'acodec': 'mp3',
+            'ar': config.get("audio_sample_rate", 16000),
+            'ac': config.get("audio_channels", 1),
+            'ab': '128k'
+        }
+    
+    def _decode_workers(self) -> int:
+        """并行解码进程数，配置为0时使用CPU核数，1为关闭"""
+        workers = config.get("parallel_decode_workers", 1)
+        if workers is None:
+            workers = 1
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        return workers
+    
+    def file_content_hash(self, file_path: str) -> str:
+        """
+        计算文件内容哈希（流式读取，结果按路径、大小、修改时间缓存）
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            十六进制哈希字符串
+        """
+        stat = os.stat(file_path)
+        cache_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        
+        with self._probe_cache_lock:
+            content_hash = self._hash_cache.get(cache_key)
+            if content_hash is not None:
+                self._hash_cache.move_to_end(cache_key)
+                return content_hash
+        
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        content_hash = hasher.hexdigest()
+        
+        with self._probe_cache_lock:
+            self._hash_cache[cache_key] = content_hash
+            while len(self._hash_cache) > self.probe_cache_size:
+                self._hash_cache.popitem(last=False)
+        return content_hash
+    
+    def load_pcm(self, file_path: str, sample_rate: Optional[int] = None, channels: Optional[int] = None) -> np.ndarray:
+        """
+        获取文件的PCM数据，优先读取解码缓存（内存映射，只读）
+        
+        Args:
+            file_path: 音频文件路径
+            sample_rate: 目标采样率（可选，默认使用配置）
+            channels: 目标声道数（可选，默认使用配置）
             
+        Returns:
+            float32 PCM数组，命中缓存时为只读内存映射
+        """
+        sample_rate = sample_rate or config.get("audio_sample_rate", 16000) or 16000
+        channels = channels or config.get("audio_channels", 1) or 1
+        
+        # 已是目标格式的PCM WAV直接内存映射，不经过ffmpeg和缓存
+        mapped = self.map_ready_pcm(file_path, sample_rate=sample_rate, channels=channels)
+        if mapped is not None:
+            return mapped
+        
+        if not config.get("pcm_cache_enabled", True):
+            return self.decode_audio(file_path, sample_rate=sample_rate, channels=channels)
+        
+        try:
+            cache_path = self.pcm_cache_dir / f"{self.file_content_hash(file_path)}_{sample_rate}_{channels}.npy"
+            if cache_path.exists():
+                # 更新修改时间作为LRU访问记录
+                os.utime(cache_path)
+                return np.load(str(cache_path), mmap_mode='r')
         except Exception as e:
-            # 备用方法：使用pydub
+            print(f"读取解码缓存失败: {e}")
+            cache_path = None
+        
+        samples = self.decode_audio(file_path, sample_rate=sample_rate, channels=channels)
+        if cache_path is not None:
             try:
-                audio = AudioSegment.from_file(audio_path)
-                # 标准化音量
-                audio = audio.normalize()
-                audio.export(output_path, format="mp3")
-                return output_path
-            except Exception as pydub_error:
-                raise Exception(f"音频标准化失败: {str(e)}, 备用方法也失败: {str(pydub_error)}")
+                self.pcm_cache_dir.mkdir(exist_ok=True)
+                # 先写入临时文件再替换，避免中断时留下不完整的缓存
+                partial_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.partial.npy")
+                np.save(str(partial_path), samples)
+                os.replace(partial_path, cache_path)
+                self._evict_pcm_cache(keep=cache_path)
+            except Exception as e:
+                print(f"写入解码缓存失败: {e}")
+        return samples
+    
+    def map_ready_pcm(self, file_path: str, sample_rate: Optional[int] = None, channels: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        若文件已是目标采样率/声道数的PCM WAV，直接内存映射其样本
+        
+        Args:
+            file_path: 音频文件路径
+            sample_rate: 目标采样率（可选，默认使用配置）
+            channels: 目标声道数（可选，默认使用配置）
+            
+        Returns:
+            float32 PCM数组（float WAV为零拷贝只读映射，16位WAV在映射上做一次缩放），不符合时返回None
+        """
+        info = self._asr_ready_info(file_path, sample_rate=sample_rate, channels=channels)
+        if info is None:
+            return None
+        
+        try:
+            data_offset, data_size = self._wav_data_region(file_path)
+            dtype = np.dtype(MAPPABLE_WAV_SUBTYPES[info.subtype])
+            frame_count = data_size // (dtype.itemsize * info.channels)
+            if frame_count == 0:
+                return None
+            shape = (frame_count, info.channels) if info.channels > 1 else (frame_count,)
+            mapped = np.memmap(file_path, dtype=dtype, mode='r', offset=data_offset, shape=shape)
+        except Exception as e:
+            print(f"内存映射WAV失败，改用解码: {e}")
+            return None
+        
+        if dtype.kind == 'f':
+            return mapped
+        return np.multiply(mapped, 1.0 / 32768.0, dtype=np.float32)
+    
+    def read_appended_pcm(self, file_path: str, start_sample: int, sample_rate: Optional[int] = None) -> np.ndarray:
+        """
+        读取录制中（持续增长）的文件自start_sample起新写入的单声道PCM
+        
+        Args:
+            file_path: 音频文件路径
+            start_sample: 起始样本位置（已读取的样本数）
+            sample_rate: 目标采样率（可选，默认使用配置）
+            
+        Returns:
+            float32 单声道PCM数组，没有新数据时为空数组
+        """
+        sample_rate = sample_rate or config.get("audio_sample_rate", 16000) or 16000
+        info = self._asr_ready_info(file_path, sample_rate=sample_rate, channels=1)
+        if info is not None:
+            # 识别格式的WAV：按文件当前大小直接读取新增的完整样本，样本位置精确
+            data_offset, data_size = self._wav_data_region(file_path)
+            dtype = np.dtype(MAPPABLE_WAV_SUBTYPES[info.subtype])
+            count = data_size // dtype.itemsize - start_sample
+            if count <= 0:
+                return np.zeros(0, dtype=np.float32)
+            with open(file_path, 'rb') as f:
+                f.seek(data_offset + start_sample * dtype.itemsize)
+                samples = np.fromfile(f, dtype=dtype, count=count)
+            if dtype.kind == 'f':
+                return samples
+            return np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+        
+        # 其他格式：从上次读取位置起解码（压缩格式按时间定位）
+        # 定位后解码器需要预热，多解码一段重叠音频并丢弃，避免衔接处失真
+        preroll_samples = min(start_sample, sample_rate)
+        try:
+            samples = self.decode_audio(file_path, sample_rate=sample_rate, channels=1,
+                                        start_seconds=(start_sample - preroll_samples) / sample_rate)
+            return samples[preroll_samples:]
+        except Exception as e:
+            # 文件末尾可能是尚未写完的帧，下次轮询再读
+            print(f"读取新增音频失败: {e}")
+            return np.zeros(0, dtype=np.float32)
+    
+    def _asr_ready_info(self, file_path: str, sample_rate: Optional[int] = None, channels: Optional[int] = None):
+        """读取WAV文件头，符合识别格式时返回soundfile信息，否则返回None"""
+        if Path(file_path).suffix.lower() != '.wav':
+            return None
+        sample_rate = sample_rate or config.get("audio_sample_rate", 16000) or 16000
+        channels = channels or config.get("audio_channels", 1) or 1
+        try:
+            info = sf.info(file_path)
+        except Exception:
+            return None
+        if info.format != 'WAV' or info.subtype not in MAPPABLE_WAV_SUBTYPES:
+            return None
+        # 录制中的文件头可能尚未回写长度（帧数为0），实际长度由_wav_data_region按文件大小计算
+        if info.samplerate != sample_rate or info.channels != channels:
+            return None
+        return info
+    
+    def _wav_data_region(self, file_path: str) -> Tuple[int, int]:
+        """
+        解析RIFF块结构，返回data块的(起始偏移, 字节数)
+        录制中未回写长度的文件按实际文件大小计算
+        """
+        file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                raise ValueError("不是RIFF/WAVE文件")
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    raise ValueError("未找到data块")
+                chunk_id = chunk_header[:4]
+                chunk_size = int.from_bytes(chunk_header[4:], 'little')
+                if chunk_id == b'data':
+                    data_offset = f.tell()
+                    available = file_size - data_offset
+                    if chunk_size == 0 or chunk_size > available:
+                        chunk_size = available
+                    return data_offset, chunk_size
+                # 块按偶数字节对齐
+                f.seek(chunk_size + (chunk_size & 1), 1)
+    
+    def _evict_pcm_cache(self, keep: Optional[Path] = None) -> None:
+        """按修改时间淘汰最久未使用的解码缓存，直到总大小不超过上限"""
+        entries = []
+        for cache_file in self.pcm_cache_dir.glob("*.npy"):
+            if cache_file.name.endswith(".partial.npy"):
+                continue
+            try:
+                stat = cache_file.stat()
+                entries.append((stat.st_mtime, stat.st_size, cache_file))
+            except OSError:
+                continue
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, cache_file in sorted(entries, key=lambda entry: entry[0]):
+            if total_bytes <= self.pcm_cache_max_bytes:
+                break
+            if keep is not None and cache_file == keep:
+                continue
+            try:
+                cache_file.unlink()
+                total_bytes -= size
+            except OSError:
+                # 文件可能仍被其他进程映射，跳过
+                continue
+    
+    def decode_audio(self, input_path: str, sample_rate: Optional[int] = None, channels: Optional[int] = None,
+                     start_seconds: float = 0.0) -> np.ndarray:
+        """
+        将音频直接解码为内存中的PCM数据（不写临时文件）
+        
+        Args:
+            input_path: 输入音频文件路径
+            sample_rate: 目标采样率（可选，默认使用配置）
+            channels: 目标声道数（可选，默认使用配置）
+            start_seconds: 解码起始时间（秒）
+            
+        Returns:
+            float32 PCM数组，单声道为一维，多声道为 (样本数, 声道数)
+        """
+        sample_rate = sample_rate or config.get("audio_sample_rate", 16000) or 16000
+        channels = channels or config.get("audio_channels", 1) or 1
+        
+        # 按时长预估缓冲区大小，ffmpeg输出直接读入NumPy缓冲区，避免中间拷贝
+        # 从中间位置解码（如读取录制中文件的新增部分）时不探测时长，按需扩容
+        duration = None
+        estimated_samples = sample_rate * 60
+        if start_seconds <= 0:
+            try:
+                duration = self.get_audio_duration(input_path)
+                estimated_samples = int(duration * sample_rate) + sample_rate
+            except Exception:
+                pass
+        buffer = np.empty(estimated_samples * channels, dtype=np.float32)
+        
+        if duration is not None and self._should_decode_in_parallel(duration):
+            try:
+                filled_bytes, buffer = self._decode_ranges_into(input_path, buffer, duration, sample_rate, channels)
+                return self._finish_pcm(buffer, filled_bytes, channels)
+            except Exception as e:
+                print(f"并行解码失败，改用单进程解码: {e}")
+        
+        filled_bytes, remainder = self._decode_into(input_path, buffer.view(np.uint8), sample_rate, channels,
+                                                    start_seconds=start_seconds, keep_remainder=True)
+        if remainder:
+            buffer = self._append_remainder(buffer, filled_bytes, remainder)
+            filled_bytes += len(remainder)
+        return self._finish_pcm(buffer, filled_bytes, channels)
     
-    def split_audio(self, audio_path: str, max_duration: int = 300) -> list:
+    def _should_decode_in_parallel(self, duration: float) -> bool:
+        """时长达到阈值且配置了多个解码进程时才按时间区间并行解码"""
+        if self._decode_workers() <= 1:
+            return False
+        min_duration = config.get("parallel_decode_min_duration", 600)
+        if min_duration is None:
+            min_duration = 600
+        return duration >= min_duration
+    
+    def _decode_ranges_into(self, input_path: str, buffer: np.ndarray, duration: float,
+                            sample_rate: int, channels: int) -> Tuple[int, np.ndarray]:
         """
-        分割长音频文件
+        按整秒时间区间切分输入，每个区间由一个ffmpeg进程解码，直接写入PCM缓冲区中对应的位置
+        区间长度为整秒，每段样本数为整数，各段首尾相接，无需拼接和重新编码
+        每个区间前后多解码1秒再丢弃，避免跳转后解码器（如MP3）前几十毫秒的输出和重采样滤波器的边缘效应出现在拼接处
+        
+        Args:
+            input_path: 输入音频文件路径
+            buffer: 按预估时长分配的float32缓冲区
+            duration: 音频时长（秒）
+            sample_rate: 采样率
+            channels: 声道数
+            
+        Returns:
+            (已写入字节数, 缓冲区)，最后一段超出预估长度时返回扩容后的缓冲区
+        """
+        # 每个区间至少60秒，避免进程开销超过收益
+        range_count = max(1, min(self._decode_workers(), int(duration // 60)))
+        range_seconds = int(duration // range_count)
+        range_bytes = range_seconds * sample_rate * channels * 4
+        byte_view = buffer.view(np.uint8)
+        
+        def decode_range(index: int) -> Tuple[int, bytes]:
+            begin = index * range_bytes
+            # 最后一个区间读到文件结尾，避免时长误差丢失尾部
+            last = index == range_count - 1
+            end = byte_view.size if last else begin + range_bytes
+            preroll = 1 if index > 0 else 0
+            return self._decode_into(input_path, byte_view[begin:end], sample_rate, channels,
+                                     start_seconds=index * range_seconds - preroll,
+                                     length_seconds=None if last else preroll + range_seconds + 1,
+                                     skip_bytes=preroll * sample_rate * channels * 4,
+                                     keep_remainder=last)
+        
+        # 解码在ffmpeg子进程中进行，线程只负责把管道输出读入缓冲区
+        with ThreadPoolExecutor(max_workers=range_count) as executor:
+            results = list(executor.map(decode_range, range(range_count)))
+        
+        for index, (filled, _) in enumerate(results[:-1]):
+            if filled < range_bytes:
+                # 区间输出少于整秒样本数时补零，保持后续区间的时间位置不变
+                begin = index * range_bytes
+                byte_view[begin + filled:begin + range_bytes] = 0
+        
+        last_filled, remainder = results[-1]
+        filled_bytes = (range_count - 1) * range_bytes + last_filled
+        if remainder:
+            buffer = self._append_remainder(buffer, filled_bytes, remainder)
+            filled_bytes += len(remainder)
+        return filled_bytes, buffer
+    
+    def _decode_into(self, input_path: str, target: np.ndarray, sample_rate: int, channels: int,
+                     start_seconds: float = 0.0, length_seconds: Optional[float] = None,
+                     skip_bytes: int = 0, keep_remainder: bool = False) -> Tuple[int, bytes]:
+        """
+        用ffmpeg把输入的一个时间区间解码为float32 PCM，直接读入target
+        
+        Args:
+            input_path: 输入音频文件路径
+            target: 目标字节缓冲区（uint8视图）
+            sample_rate: 采样率
+            channels: 声道数
+            start_seconds: 解码起始时间（秒）
+            length_seconds: 解码时长（秒，None表示到结尾）
+            skip_bytes: 丢弃的输出开头字节数
+            keep_remainder: target写满后是否保留剩余输出（否则丢弃）
+            
+        Returns:
+            (写入target的字节数, target写满后剩余的输出)
+        """
+        input_kwargs: Dict[str, Any] = {}
+        if start_seconds > 0:
+            input_kwargs['ss'] = start_seconds
+        if length_seconds is not None:
+            input_kwargs['t'] = length_seconds
+        try:
+            process = (
+                ffmpeg
+                .input(input_path, **input_kwargs)['a:0']
+                .output('pipe:', format='f32le', acodec='pcm_f32le', ac=channels, ar=sample_rate, vn=None)
+                .global_args('-nostdin', '-loglevel', 'error')
+                .run_async(pipe_stdout=True, pipe_stderr=True)
+            )
+        except Exception as e:
+            raise Exception(f"音频解码失败: {str(e)}")
+        
+        filled_bytes = 0
+        remainder = []
+        try:
+            while skip_bytes > 0:
+                skipped = process.stdout.read(min(skip_bytes, 1024 * 1024))
+                if not skipped:
+                    break
+                skip_bytes -= len(skipped)
+            while filled_bytes < target.size:
+                read_bytes = process.stdout.readinto(target[filled_bytes:])
+                if not read_bytes:
+                    break
+                filled_bytes += read_bytes
+            # 预估不足或区间输出略长时继续读出剩余输出，让ffmpeg正常结束
+            for chunk in iter(lambda: process.stdout.read(1024 * 1024), b''):
+                if keep_remainder:
+                    remainder.append(chunk)
+            stderr = process.stderr.read()
+            return_code = process.wait()
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+        
+        if return_code != 0:
+            raise Exception(f"音频解码失败: {stderr.decode('utf-8', errors='ignore').strip()}")
+        return filled_bytes, b''.join(remainder)
+    
+    def _append_remainder(self, buffer: np.ndarray, filled_bytes: int, remainder: bytes) -> np.ndarray:
+        """预估长度不足时扩容缓冲区，追加超出部分的PCM数据"""
+        grown = np.empty((filled_bytes + len(remainder)) // 4 + 1, dtype=np.float32)
+        grown_bytes = grown.view(np.uint8)
+        grown_bytes[:filled_bytes] = buffer.view(np.uint8)[:filled_bytes]
+        grown_bytes[filled_bytes:filled_bytes + len(remainder)] = np.frombuffer(remainder, dtype=np.uint8)
+        return grown
+    
+    def _finish_pcm(self, buffer: np.ndarray, filled_bytes: int, channels: int) -> np.ndarray:
+        """截取已写入的样本，预估偏大时释放多余内存，多声道整理为 (样本数, 声道数)"""
+        filled = filled_bytes // 4
+        filled -= filled % channels
+        samples = buffer[:filled]
+        if buffer.size - filled > buffer.size // 10:
+            # 预估偏大时释放多余内存
+            samples = samples.copy()
+        if channels > 1:
+            samples = samples.reshape(-1, channels)
+        return samples
+    
+    def normalize_audio(self, audio_path: str, output_path: Optional[str] = None) -> str:
+        """
+        音频标准化处理（内存中分块标准化后写出无损WAV，不再经过loudnorm和MP3重编码）
         
         Args:
             audio_path: 音频文件路径
-            max_duration: 每段最大时长（秒）
+            output_path: 输出音频文件路径（可选）
             
         Returns:
-            分割后的音频文件路径列表
+            标准化后的音频文件路径（未指定输出路径时，使用完毕后需调用release_temp_file释放）
         """
+        owns_job = output_path is None
+        if output_path is None:
+            output_path = str(temp_workspace.create_job("normalize") / f"normalized_{Path(audio_path).stem}.wav")
+        
         try:
-            audio = AudioSegment.from_file(audio_path)
-            duration_ms = len(audio)
-            max_duration_ms = max_duration * 1000
+            sample_rate = config.get("audio_sample_rate", 16000) or 16000
+            samples = self.decode_audio(audio_path, sample_rate=sample_rate)
+            samples = self.normalize_pcm(samples, sample_rate=sample_rate, in_place=True)
+            sf.write(output_path, samples, sample_rate, subtype='PCM_16')
+            return output_path
+        except Exception as e:
+            if owns_job:
+                temp_workspace.release_job(output_path, remove=True)
+            raise Exception(f"音频标准化失败: {str(e)}")
+    
+    def normalize_pcm(self, samples: np.ndarray, sample_rate: Optional[int] = None, target_dbfs: float = -20.0,
+                      block_seconds: float = 0.4, smooth_seconds: float = 3.0, max_gain_db: float = 30.0,
+                      gate_dbfs: float = -50.0, limiter_threshold: float = 0.9, in_place: bool = False) -> np.ndarray:
+        """
+        基于NumPy的分块响度标准化：按块计算RMS增益并平滑，再经软限幅器防止削波
+        
+        Args:
+            samples: float32 PCM数组（一维或 (样本数, 声道数)）
+            sample_rate: 采样率（可选，默认使用配置）
+            target_dbfs: 目标RMS电平（dBFS）
+            block_seconds: 能量统计块长度（秒）
+            smooth_seconds: 增益平滑窗口长度（秒）
+            max_gain_db: 最大增益（dB）
+            gate_dbfs: 低于该电平的块视为静音，不参与增益计算
+            limiter_threshold: 软限幅起始幅度
+            in_place: 是否直接修改输入数组
+            
+        Returns:
+            标准化后的PCM数组
+        """
+        sample_rate = sample_rate or config.get("audio_sample_rate", 16000) or 16000
+        if samples.dtype != np.float32:
+            output = samples.astype(np.float32)
+        else:
+            output = samples if in_place else samples.copy()
+        frame_count = output.shape[0]
+        if frame_count == 0:
+            return output
+        
+        block = max(1, int(block_seconds * sample_rate))
+        block_count = (frame_count + block - 1) // block
+        # 每次处理的块数，限制临时数组大小（约60秒）
+        blocks_per_chunk = max(1, int(60 / block_seconds))
+        
+        # 1. 分块统计均方能量
+        energies = np.empty(block_count, dtype=np.float64)
+        for first_block in range(0, block_count, blocks_per_chunk):
+            last_block = min(first_block + blocks_per_chunk, block_count)
+            chunk = output[first_block * block:min(last_block * block, frame_count)]
+            squares = np.square(chunk, dtype=np.float64)
+            if squares.ndim > 1:
+                squares = squares.mean(axis=1)
+            starts = np.arange(0, squares.shape[0], block)
+            counts = np.diff(np.append(starts, squares.shape[0]))
+            energies[first_block:last_block] = np.add.reduceat(squares, starts) / counts
+        
+        # 2. 计算每块增益（dB），静音块沿用相邻有效块的增益，避免放大噪声段
+        levels_db = 10 * np.log10(energies + 1e-12)
+        active = levels_db > gate_dbfs
+        if not active.any():
+            return output
+        gains_db = np.clip(target_dbfs - levels_db, -max_gain_db, max_gain_db)
+        block_index = np.arange(block_count)
+        gains_db = np.interp(block_index, block_index[active], gains_db[active])
+        
+        # 3. 平滑增益曲线，避免字词内部的增益跳变
+        smooth_blocks = max(1, int(smooth_seconds / block_seconds))
+        if smooth_blocks > 1 and block_count > 1:
+            padded = np.pad(gains_db, (smooth_blocks // 2, smooth_blocks - 1 - smooth_blocks // 2), mode='edge')
+            gains_db = np.convolve(padded, np.ones(smooth_blocks) / smooth_blocks, mode='valid')
+        gains = np.power(10.0, gains_db / 20.0)
+        block_centers = block_index * block + block / 2
+        
+        # 4. 分段应用逐样本插值增益并软限幅
+        headroom = 1.0 - limiter_threshold
+        chunk_frames = blocks_per_chunk * block
+        for chunk_start in range(0, frame_count, chunk_frames):
+            chunk = output[chunk_start:chunk_start + chunk_frames]
+            chunk_gains = np.interp(np.arange(chunk_start, chunk_start + chunk.shape[0]), block_centers, gains).astype(np.float32)
+            if chunk.ndim > 1:
+                chunk *= chunk_gains[:, None]
+            else:
+                chunk *= chunk_gains
+            over = np.abs(chunk) > limiter_threshold
+            if over.any():
+                peaks = chunk[over]
+                chunk[over] = np.sign(peaks) * (limiter_threshold + headroom * np.tanh((np.abs(peaks) - limiter_threshold) / headroom))
+        
+        return output
+    
+    def trim_silence(self, samples: np.ndarray, sample_rate: Optional[int] = None, min_silence_seconds: float = 2.0,
+                     keep_padding_seconds: float = 0.3, frame_seconds: float = 0.03,
+                     energy_threshold_db: Optional[float] = None,
+                     zcr_threshold: float = 0.25) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+        """
+        基于短时能量和过零率去除长静音段（向量化计算）
+        
+        Args:
+            samples: float32 PCM数组（一维或 (样本数, 声道数)）
+            sample_rate: 采样率（可选，默认使用配置）
+            min_silence_seconds: 超过该时长的静音段才会被去除（秒）
+            keep_padding_seconds: 静音段两端保留的时长（秒）
+            frame_seconds: 分析帧长（秒）
+            energy_threshold_db: 静音能量阈值（dBFS），None时按底噪自适应
+            zcr_threshold: 能量略低于阈值但过零率高于该值的帧仍视为语音（清辅音）
+            
+        Returns:
+            (去除静音后的PCM数组, 时间映射表[(裁剪后起始秒, 原始起始秒, 时长秒), ...])
+        """
+        sample_rate = sample_rate or config.get("audio_sample_rate", 16000) or 16000
+        total_frames = samples.shape[0]
+        total_seconds = total_frames / sample_rate
+        frame = max(1, int(frame_seconds * sample_rate))
+        frame_count = total_frames // frame
+        full_map = [(0.0, 0.0, total_seconds)]
+        if frame_count == 0:
+            return samples, full_map
+        
+        # 分段计算每帧能量和过零率，限制临时数组大小
+        levels_db = np.empty(frame_count, dtype=np.float64)
+        zero_crossings = np.empty(frame_count, dtype=np.float64)
+        frames_per_chunk = max(1, int(60 / frame_seconds))
+        for first in range(0, frame_count, frames_per_chunk):
+            last = min(first + frames_per_chunk, frame_count)
+            chunk = samples[first * frame:last * frame]
+            if chunk.ndim > 1:
+                chunk = chunk.mean(axis=1)
+            framed = chunk.reshape(last - first, frame)
+            levels_db[first:last] = 10 * np.log10(np.mean(np.square(framed, dtype=np.float64), axis=1) + 1e-12)
+            zero_crossings[first:last] = np.count_nonzero(np.diff(np.signbit(framed), axis=1), axis=1) / frame
+        
+        if energy_threshold_db is None:
+            # 以较安静的10%帧估计底噪，高出10dB视为语音
+            energy_threshold_db = max(float(np.percentile(levels_db, 10)) + 10.0, -55.0)
+        speech = (levels_db > energy_threshold_db) | (
+            (levels_db > energy_threshold_db - 6.0) & (zero_crossings > zcr_threshold)
+        )
+        
+        # 查找连续静音帧区间
+        padded = np.concatenate(([False], ~speech, [False])).astype(np.int8)
+        edges = np.diff(padded)
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        min_run = int(min_silence_seconds / frame_seconds)
+        pad = int(keep_padding_seconds / frame_seconds)
+        long_runs = (run_ends - run_starts) >= max(min_run, 2 * pad + 1)
+        if not long_runs.any():
+            return samples, full_map
+        
+        # 去除静音段内部，两端各保留padding；末尾不足一帧的样本始终保留
+        cut_starts = (run_starts[long_runs] + pad) * frame
+        cut_ends = np.minimum((run_ends[long_runs] - pad) * frame, total_frames)
+        keep_starts = np.concatenate(([0], cut_ends))
+        keep_ends = np.concatenate((cut_starts, [total_frames]))
+        
+        pieces = []
+        offset_map = []
+        trimmed_position = 0
+        for keep_start, keep_end in zip(keep_starts.tolist(), keep_ends.tolist()):
+            if keep_end <= keep_start:
+                continue
+            pieces.append(samples[keep_start:keep_end])
+            offset_map.append((trimmed_position / sample_rate, keep_start / sample_rate, (keep_end - keep_start) / sample_rate))
+            trimmed_position += keep_end - keep_start
+        
+        return np.concatenate(pieces), offset_map
+    
+    def map_trimmed_time(self, trimmed_seconds: float, offset_map: List[Tuple[float, float, float]]) -> float:
+        """
+        将去除静音后音频中的时间映射回原始音频时间
+        
+        Args:
+            trimmed_seconds: 裁剪后音频中的时间（秒）
+            offset_map: trim_silence返回的时间映射表
             
-            if duration_ms <= max_duration_ms:
+        Returns:
+            原始音频中的时间（秒）
+        """
+        if not offset_map:
+            return trimmed_seconds
+        index = bisect.bisect_right([entry[0] for entry in offset_map], trimmed_seconds) - 1
+        trimmed_start, original_start, length = offset_map[max(index, 0)]
+        return original_start + min(max(trimmed_seconds - trimmed_start, 0.0), length)
+    
+    def split_audio(self, audio_path: str, max_duration: int = 300, align_to_silence: bool = True,
+                    search_window: float = 30.0) -> list:
+        """
+        分割长音频文件（ffmpeg分段封装，流式处理，内存占用与时长无关）
+        
+        Args:
+            audio_path: 音频文件路径
+            max_duration: 每段最大时长（秒）
+            align_to_silence: 是否将切分点移动到最近的静音处，避免切断语句
+            search_window: 标称切分点之前无静音时，向后延伸搜索静音的范围（秒）
+            
+        Returns:
+            分割后的音频文件路径列表（分割时使用完毕后需调用release_temp_file释放）
+        """
+        job_dir = None
+        try:
+            duration = self.get_audio_duration(audio_path)
+            if duration <= max_duration:
                 return [audio_path]
             
-            segments = []
-            for i in range(0, duration_ms, max_duration_ms):
-                segment = audio[i:i + max_duration_ms]
-                segment_path = str(self.temp_dir / f"segment_{i//max_duration_ms}_{Path(audio_path).name}")
-                segment.export(segment_path, format="mp3")
-                segments.append(segment_path)
+            silences = self.detect_silences(audio_path) if align_to_silence else []
+            cut_points = self._choose_cut_points(duration, max_duration, silences, search_window)
             
-            return segments
+            # 编码支持时直接流复制，否则重新编码为mp3
+            codec = ""
+            try:
+                audio_streams = [st for st in self.probe_audio(audio_path)['streams'] if st.get('codec_type') == 'audio']
+                codec = audio_streams[0].get('codec_name', '') if audio_streams else ""
+            except Exception:
+                pass
+            
+            if codec in STREAM_COPY_FORMATS:
+                extension, segment_format = STREAM_COPY_FORMATS[codec]
+                codec_kwargs = {'acodec': 'copy'}
+            else:
+                extension, segment_format = '.mp3', 'mp3'
+                codec_kwargs = {'acodec': 'libmp3lame', 'ab': '128k'}
+            
+            stem = Path(audio_path).stem
+            job_dir = temp_workspace.create_job("split")
+            output_pattern = str(job_dir / f"segment_%03d_{stem}{extension}")
+            stream = ffmpeg.input(audio_path)['a:0']
+            stream = ffmpeg.output(
+                stream,
+                output_pattern,
+                f='segment',
+                segment_format=segment_format,
+                segment_times=",".join(f"{t:.3f}" for t in cut_points),
+                reset_timestamps=1,
+                **codec_kwargs
+            )
+            ffmpeg.run(stream, overwrite_output=True, quiet=True)
+            
+            return [
+                str(job_dir / f"segment_{i:03d}_{stem}{extension}")
+                for i in range(len(cut_points) + 1)
+                if (job_dir / f"segment_{i:03d}_{stem}{extension}").exists()
+            ]
             
         except Exception as e:
+            if job_dir is not None:
+                temp_workspace.release_job(job_dir, remove=True)
             raise Exception(f"音频分割失败: {str(e)}")
     
+    def detect_silences(self, audio_path: str, noise_db: float = -35.0, min_silence: float = 0.5) -> List[Tuple[float, float]]:
+        """
+        使用ffmpeg silencedetect流式检测静音区间
+        
+        Args:
+            audio_path: 音频文件路径
+            noise_db: 静音判定阈值（dB）
+            min_silence: 最短静音时长（秒）
+            
+        Returns:
+            静音区间列表 [(开始秒, 结束秒), ...]
+        """
+        process = (
+            ffmpeg
+            .input(audio_path)
+            .audio
+            .filter('silencedetect', noise=f'{noise_db}dB', d=min_silence)
+            .output('-', format='null')
+            .global_args('-nostdin', '-hide_banner')
+            .run_async(pipe_stderr=True)
+        )
+        
+        silences = []
+        silence_start = None
+        try:
+            # 逐行解析日志，不缓存整个输出
+            for raw_line in process.stderr:
+                line = raw_line.decode('utf-8', errors='ignore')
+                if 'silence_start:' in line:
+                    silence_start = float(line.split('silence_start:')[1].split()[0])
+                elif 'silence_end:' in line and silence_start is not None:
+                    silence_end = float(line.split('silence_end:')[1].split()[0])
+                    silences.append((silence_start, silence_end))
+                    silence_start = None
+            process.wait()
+        finally:
+            process.stderr.close()
+        
+        return silences
+    
+    def _choose_cut_points(self, duration: float, max_duration: float,
+                           silences: List[Tuple[float, float]], search_window: float) -> List[float]:
+        """
+        计算切分点：优先选择标称切分点之前最近的静音中点，
+        其次选择之后搜索范围内的静音中点，都没有时使用标称切分点
+        """
+        midpoints = [(start + end) / 2 for start, end in silences]
+        cut_points = []
+        previous = 0.0
+        while duration - previous > max_duration:
+            target = previous + max_duration
+            before = [m for m in midpoints if previous + max_duration / 2 < m <= target]
+            after = [m for m in midpoints if target < m <= target + search_window]
+            if before:
+                cut = max(before)
+            elif after:
+                cut = min(after)
+            else:
+                cut = target
+            if duration - cut < 1.0:
+                break
+            cut_points.append(cut)
+            previous = cut
+        return cut_points
+    
+    def release_temp_file(self, file_path: str) -> None:
+        """
+        释放临时输出文件（删除其所属的任务目录）
+        convert_audio、extract_audio、normalize_audio和split_audio的输出在调用方释放前一直处于使用中状态，不会被淘汰
+        
+        Args:
+            file_path: convert_audio等方法生成的临时文件路径（split_audio的任一分段路径会释放全部分段）
+        """
+        temp_workspace.release_job(file_path, remove=True)
+    
     def cleanup_temp_files(self):
-        """清理临时文件"""
+        """清理临时文件（本次会话的任务目录；解码缓存保留）"""
         try:
+            temp_workspace.cleanup_session()
             for file_path in self.temp_dir.glob("*"):
                 if file_path.is_file():
                     file_path.unlink()
         except Exception as e:
             print(f"清理临时文件失败: {e}")
     
+    def get_channel_count(self, file_path: str) -> int:
+        """
+        获取音频声道数（优先读取文件头，其次读取探测缓存）
+        
+        Args:
+            file_path: 音频文件路径
+            
+        Returns:
+            声道数，无法获取时返回1
+        """
+        try:
+            return sf.info(file_path).channels
+        except Exception:
+            pass
+        try:
+            audio_streams = [st for st in self.probe_audio(file_path)['streams'] if st.get('codec_type') == 'audio']
+            if audio_streams:
+                return int(audio_streams[0].get('channels', 1)) or 1
+        except Exception:
+            pass
+        return 1
+    
     def get_audio_info(self, file_path: str) -> dict:
         """
         获取音频文件信息
@@ -207,7 +1116,7 @@ class AudioProcessor:
             音频信息字典
         """
         try:
-            probe = ffmpeg.probe(file_path)
+            probe = self.probe_audio(file_path)
             format_info = probe['format']
             stream_info = probe['streams'][0] if probe['streams'] else {}
             
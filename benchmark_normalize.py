@@ -0,0 +1,72 @@
+"""
+响度标准化性能基准 - 会议纪要生成神器
+对比旧流程（ffmpeg loudnorm + MP3重编码，识别前再次解码）与
+新流程（一次解码到内存 + NumPy分块标准化）的耗时
+
+用法: python benchmark_normalize.py <音频文件> [重复次数]
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+import ffmpeg
+
+from config import config
+from audio_processor import audio_processor
+
+def run_legacy(audio_path: str, output_path: str, sample_rate: int) -> None:
+    """旧流程：loudnorm滤镜输出MP3，识别前再解码一次"""
+    stream = ffmpeg.input(audio_path)
+    stream = ffmpeg.filter(stream, 'loudnorm')
+    stream = ffmpeg.output(stream, output_path, acodec='mp3')
+    ffmpeg.run(stream, overwrite_output=True, quiet=True)
+    audio_processor.decode_audio(output_path, sample_rate=sample_rate, channels=1)
+
+def run_numpy(audio_path: str, sample_rate: int) -> None:
+    """新流程：解码到内存后原地标准化，直接送入识别"""
+    samples = audio_processor.decode_audio(audio_path, sample_rate=sample_rate, channels=1)
+    audio_processor.normalize_pcm(samples, sample_rate=sample_rate, in_place=True)
+
+def best_of(func, repeat: int) -> float:
+    """多次运行取最短耗时"""
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+def main():
+    """主函数"""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    
+    audio_path = sys.argv[1]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    sample_rate = config.get("audio_sample_rate", 16000) or 16000
+    duration = audio_processor.get_audio_duration(audio_path)
+    
+    samples = audio_processor.decode_audio(audio_path, sample_rate=sample_rate, channels=1)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_output = os.path.join(temp_dir, "legacy.mp3")
+        legacy_time = best_of(lambda: run_legacy(audio_path, legacy_output, sample_rate), repeat)
+    numpy_time = best_of(lambda: run_numpy(audio_path, sample_rate), repeat)
+    normalize_only_time = best_of(lambda: audio_processor.normalize_pcm(samples, sample_rate=sample_rate), repeat)
+    
+    print("=" * 60)
+    print(f"音频: {audio_path}（{duration:.1f}秒，取{repeat}次最短耗时）")
+    print("=" * 60)
+    print(f"{'流程':<28}{'耗时(秒)':>10}{'实时倍数':>12}")
+    for name, elapsed in [
+        ("loudnorm + MP3 + 再解码", legacy_time),
+        ("解码 + NumPy标准化", numpy_time),
+        ("仅NumPy标准化", normalize_only_time),
+    ]:
+        print(f"{name:<28}{elapsed:>10.2f}{duration / elapsed:>11.0f}x")
+    print(f"\n加速比: {legacy_time / numpy_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+识别参数校准 - 会议纪要生成神器
+在参考音频上扫描 VAD 最大语音段时长、语音段合并时长和批大小三个参数，测量每种组合的实时率和峰值内存（GPU为显存），
+在不超过内存上限、且识别结果与默认参数相比字差异不超过 --max-diff 的组合中选出最快的，写入 config.json
+
+用法: python calibrate_asr.py <参考音频> [--max-memory-mb 内存上限MB] [--max-diff 0.02] [--no-save]
+参考音频建议使用3-10分钟的真实会议录音；修改 vad_max_single_segment_time 需重新加载模型，每个取值加载一次
+"""
+
+import sys
+import threading
+import time
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+from config import config
+from audio_processor import audio_processor
+from speech_recognition import SpeechRecognizer
+from compare_cpu_precision import character_error_rate
+
+# 扫描的参数取值（包含默认值 30000 / 15 / 60）
+VAD_MAX_SEGMENT_MS = [20000, 30000, 60000]
+MERGE_LENGTH_S = [10, 15, 30]
+BATCH_SIZE_S = [30, 60, 120, 300]
+
+DEFAULT_SETTINGS = (30000, 15, 60)
+
+class PeakMemoryMonitor:
+    """测量一段代码运行期间的峰值内存（GPU为已分配显存，CPU为进程常驻内存，需安装psutil）"""
+
+    def __init__(self, use_cuda: bool, interval: float = 0.05):
+        self.use_cuda = use_cuda
+        self.interval = interval
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = None
+
+    def __enter__(self):
+        if self.use_cuda:
+            import torch
+            torch.cuda.synchronize()
+            torch.cuda.reset_peak_memory_stats()
+            return self
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            return self
+        self.peak_mb = self._process.memory_info().rss / 2 ** 20
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.use_cuda:
+            import torch
+            torch.cuda.synchronize()
+            self.peak_mb = torch.cuda.max_memory_allocated() / 2 ** 20
+        elif self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        return False
+
+    def _sample(self) -> None:
+        """采样线程：定期读取进程常驻内存"""
+        process = self._process
+        if process is None:
+            return
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb or 0.0, process.memory_info().rss / 2 ** 20)
+
+def transcribe(recognizer: SpeechRecognizer, samples: np.ndarray, segments: List[List[int]],
+               sample_rate: int, batch_size_s: float) -> str:
+    """按指定批大小识别全部语音段（不记录实时率，避免校准过程影响识别时的预计时间）"""
+    texts = [""] * len(segments)
+    for batch in recognizer._plan_batches([end - begin for begin, end in segments], batch_size_s):
+        inputs = [recognizer._segment_samples(samples, segments[i], sample_rate) for i in batch]
+        for i, text in zip(batch, recognizer._infer_segments(inputs, sample_rate)):
+            texts[i] = text
+    return "".join(texts)
+
+def sweep(samples: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+    """扫描全部参数组合，返回每个组合的耗时、峰值内存和识别结果"""
+    results = []
+    for vad_ms in VAD_MAX_SEGMENT_MS:
+        # VAD最大语音段时长在加载模型时生效
+        config.default_config["vad_max_single_segment_time"] = vad_ms
+        recognizer = SpeechRecognizer(use_server=False)
+        print(f"正在加载模型（vad_max_single_segment_time={vad_ms}）...")
+        recognizer.initialize_model()
+        use_cuda = recognizer.backend == "pytorch" and recognizer.device != "cpu"
+        try:
+            # 预热一次，排除首次推理的额外开销
+            transcribe(recognizer, samples, [[0, min(1000, len(samples) * 1000 // sample_rate)]], sample_rate, 60)
+
+            with PeakMemoryMonitor(use_cuda) as vad_memory:
+                start_time = time.perf_counter()
+                raw_segments = recognizer._detect_speech(samples, sample_rate)
+                vad_seconds = time.perf_counter() - start_time
+
+            for merge_s in MERGE_LENGTH_S:
+                segments = recognizer._merge_vad_segments(raw_segments, merge_s * 1000)
+                for batch_s in BATCH_SIZE_S:
+                    result: Dict[str, Any] = {"vad_ms": vad_ms, "merge_s": merge_s, "batch_s": batch_s,
+                                              "segments": len(segments), "error": None}
+                    try:
+                        with PeakMemoryMonitor(use_cuda) as memory:
+                            start_time = time.perf_counter()
+                            result["text"] = transcribe(recognizer, samples, segments, sample_rate, batch_s)
+                            result["seconds"] = vad_seconds + time.perf_counter() - start_time
+                        peaks = [peak for peak in (vad_memory.peak_mb, memory.peak_mb) if peak is not None]
+                        result["peak_mb"] = max(peaks) if peaks else None
+                    except Exception as e:
+                        # 显存/内存不足等失败的组合不参与选择
+                        result["error"] = str(e)
+                        if use_cuda:
+                            import torch
+                            torch.cuda.empty_cache()
+                    results.append(result)
+                    print(f"  merge={merge_s}s batch={batch_s}s: "
+                          + (f"失败 {result['error']}" if result["error"] else f"{result['seconds']:.1f}秒"))
+        finally:
+            recognizer.cleanup()
+    return results
+
+def main():
+    """主函数"""
+    args = sys.argv[1:]
+    max_memory_mb: Optional[float] = None
+    max_diff = 0.02
+    save = "--no-save" not in args
+    if not save:
+        args.remove("--no-save")
+    if "--max-memory-mb" in args:
+        index = args.index("--max-memory-mb")
+        max_memory_mb = float(args[index + 1])
+        del args[index:index + 2]
+    if "--max-diff" in args:
+        index = args.index("--max-diff")
+        max_diff = float(args[index + 1])
+        del args[index:index + 2]
+    if len(args) != 1:
+        print(__doc__)
+        return
+
+    sample_rate = config.get("audio_sample_rate", 16000) or 16000
+    samples = np.asarray(audio_processor.load_pcm(args[0], sample_rate=sample_rate, channels=1))
+    audio_seconds = samples.shape[0] / sample_rate
+    original = {key: config.get(key) for key in ("asr_batch_size_s", "asr_merge_length_s", "vad_max_single_segment_time")}
+
+    results = sweep(samples, sample_rate)
+    baseline = next((r for r in results if (r["vad_ms"], r["merge_s"], r["batch_s"]) == DEFAULT_SETTINGS and not r["error"]), None)
+
+    print("=" * 72)
+    print(f"参考音频: {audio_seconds:.1f}秒")
+    print(f"{'VAD最大段':>10}{'合并时长':>8}{'批大小':>8}{'语音段':>8}{'实时率':>10}{'峰值内存':>12}{'字差异':>10}")
+    candidates = []
+    for r in results:
+        if r["error"]:
+            print(f"{r['vad_ms']:>10}{r['merge_s']:>8}{r['batch_s']:>8}{r['segments']:>8}{'失败':>10}")
+            continue
+        r["diff"] = character_error_rate(baseline["text"], r["text"]) if baseline else 0.0
+        peak_text = f"{r['peak_mb']:.0f}MB" if r["peak_mb"] is not None else "-"
+        print(f"{r['vad_ms']:>10}{r['merge_s']:>8}{r['batch_s']:>8}{r['segments']:>8}"
+              f"{r['seconds'] / audio_seconds:>10.3f}{peak_text:>12}{r['diff']:>10.2%}")
+        if max_memory_mb is not None and r["peak_mb"] is not None and r["peak_mb"] > max_memory_mb:
+            continue
+        if r["diff"] > max_diff:
+            continue
+        candidates.append(r)
+    print("=" * 72)
+
+    if not candidates:
+        config.default_config.update(original)
+        print("没有满足内存上限和字差异要求的参数组合，配置未修改")
+        return
+    best = min(candidates, key=lambda r: r["seconds"])
+    print(f"最快组合: vad_max_single_segment_time={best['vad_ms']}, asr_merge_length_s={best['merge_s']}, "
+          f"asr_batch_size_s={best['batch_s']}（实时率 {best['seconds'] / audio_seconds:.3f}）")
+
+    if save:
+        config.default_config.update({
+            "asr_batch_size_s": best["batch_s"],
+            "asr_merge_length_s": best["merge_s"],
+            "vad_max_single_segment_time": best["vad_ms"],
+        })
+        config.save_config()
+        print(f"已写入 {config.config_file}")
+    else:
+        config.default_config.update(original)
+
+if __name__ == "__main__":
+    main()
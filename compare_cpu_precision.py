@@ -0,0 +1,105 @@
+"""
+CPU推理精度对比 - 会议纪要生成神器
+分别用 fp32 和 int8（编码器动态量化）在CPU上识别样例音频，对比实时率和识别差异
+加 --backends 时同时测试 ONNX Runtime 后端（fp32 和 int8），需已安装 funasr-onnx 和 onnxruntime
+
+用法: python compare_cpu_precision.py <音频文件> [音频文件...] [--reference 参考文本.txt] [--backends]
+不提供参考文本时以 PyTorch fp32 的识别结果为基准计算其他配置的字错误率
+"""
+
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from config import config
+from audio_processor import audio_processor
+from speech_recognition import SpeechRecognizer
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    """计算字错误率（编辑距离/参考文本字数，忽略空白）"""
+    reference = "".join(reference.split())
+    hypothesis = "".join(hypothesis.split())
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    hyp_codes = np.array([ord(c) for c in hypothesis], dtype=np.int64)
+    offsets = np.arange(len(hypothesis) + 1)
+    previous = offsets.copy()
+    for i, ref_char in enumerate(reference, 1):
+        # 替换/删除按向量计算，插入通过累积最小值传播
+        current = np.empty_like(previous)
+        current[0] = i
+        current[1:] = np.minimum(previous[1:] + 1, previous[:-1] + (hyp_codes != ord(ref_char)))
+        current = np.minimum.accumulate(current - offsets) + offsets
+        previous = current
+    return float(previous[-1]) / len(reference)
+
+def run(backend: str, precision: str, audio_paths: List[str]):
+    """用指定后端和精度加载模型并识别全部音频，返回(加载耗时, 识别耗时, 识别结果列表)"""
+    recognizer = SpeechRecognizer(use_server=False)
+    recognizer.backend = backend
+    recognizer.device = "cpu"
+    recognizer.cpu_precision = precision
+
+    start_time = time.perf_counter()
+    recognizer.initialize_model()
+    load_time = time.perf_counter() - start_time
+
+    texts = []
+    start_time = time.perf_counter()
+    for audio_path in audio_paths:
+        texts.append(recognizer.recognize_audio(audio_path))
+    recognize_time = time.perf_counter() - start_time
+
+    recognizer.cleanup()
+    return load_time, recognize_time, texts
+
+def main():
+    """主函数"""
+    args = sys.argv[1:]
+    reference_path: Optional[str] = None
+    compare_backends = "--backends" in args
+    if compare_backends:
+        args.remove("--backends")
+    if "--reference" in args:
+        index = args.index("--reference")
+        reference_path = args[index + 1]
+        del args[index:index + 2]
+    if not args:
+        print(__doc__)
+        return
+
+    # 关闭结果缓存和重复检测，保证两种精度都实际运行模型
+    config.default_config["transcript_cache_enabled"] = False
+    config.default_config["duplicate_detection_enabled"] = False
+
+    audio_seconds = sum(audio_processor.get_audio_duration(path) for path in args)
+    variants = [("pytorch", "fp32"), ("pytorch", "int8")]
+    if compare_backends:
+        variants += [("onnx", "fp32"), ("onnx", "int8")]
+    results = {}
+    for backend, precision in variants:
+        name = f"{backend}-{precision}"
+        print(f"正在使用 {name} 识别...")
+        results[name] = run(backend, precision, args)
+
+    reference_texts = None
+    if reference_path:
+        with open(reference_path, 'r', encoding='utf-8') as f:
+            reference_texts = [f.read()] if len(args) == 1 else f.read().split("\n\n")
+
+    print("=" * 60)
+    print(f"音频: {len(args)} 个文件，共 {audio_seconds:.1f}秒")
+    print(f"{'配置':<14}{'加载耗时':>10}{'识别耗时':>10}{'实时率':>10}{'字错误率':>10}")
+    for name, (load_time, recognize_time, texts) in results.items():
+        baseline = reference_texts if reference_texts else results["pytorch-fp32"][2]
+        cer = np.mean([character_error_rate(ref, hyp) for ref, hyp in zip(baseline, texts)])
+        cer_text = "-" if name == "pytorch-fp32" and not reference_texts else f"{cer:.2%}"
+        print(f"{name:<14}{load_time:>9.1f}s{recognize_time:>9.1f}s{recognize_time / audio_seconds:>10.3f}{cer_text:>10}")
+    print("=" * 60)
+    if not reference_texts:
+        print("未提供参考文本，字错误率以 pytorch-fp32 的识别结果为基准")
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,11 @@ class Config:
             "audio_format": "mp3",
             "audio_sample_rate": 16000,
             "audio_channels": 1,
+            "probe_cache_size": 256,  # ffprobe结果缓存条目数
+            "parallel_decode_workers": 1,  # 长音频按时间区间并行解码的进程数（1为关闭，0表示使用CPU核数）
+            "parallel_decode_min_duration": 600,  # 启用并行解码的最短时长（秒）
+            "pcm_cache_enabled": True,  # 缓存解码后的PCM，重复识别时跳过解码
+            "pcm_cache_max_bytes": 2 * 1024 * 1024 * 1024,  # 解码缓存上限（字节）
             
             # 日志配置
             "log_dir": "logs",
@@ -66,10 +71,33 @@ class Config:
             
             # 临时文件路径
             "temp_dir": "temp",
+            "temp_max_bytes": 5 * 1024 * 1024 * 1024,  # 临时任务目录总占用上限（字节）
             
             # 模型配置
-            "speech_model": "SenseVoiceSmall",
+            "speech_model": "SenseVoiceSmall",  # SenseVoiceSmall（PyTorch）或 SenseVoiceSmall-onnx（ONNX Runtime，仅CPU）
             "use_gpu": True,
+            "asr_normalize_audio": False,  # 识别前在内存中标准化响度
+            "asr_trim_silence": False,  # 识别前去除长静音段
+            "asr_trim_min_silence": 2.0,  # 去除的最短静音时长（秒）
+            "duplicate_detection_enabled": True,  # 通过音频指纹识别重复上传的录音并复用识别结果
+            "fingerprint_index_max_entries": 500,  # 指纹索引最多保存的录音数
+            "fingerprint_index_max_bytes": 64 * 1024 * 1024,  # 指纹索引总大小上限（字节）
+            "asr_split_channels": False,  # 多轨录音按声道分别识别（每个声道一位发言人）
+            "follow_poll_interval": 2.0,  # 跟随录制中文件时的轮询间隔（秒）
+            "follow_idle_timeout": 0,  # 文件停止增长超过该时长（秒）视为录制结束（0表示等待手动结束）
+            "model_warmup_on_start": False,  # 启动界面时在后台预加载并预热语音识别模型
+            "asr_server_enabled": False,  # 将识别请求发送到常驻识别服务（python asr_server.py），多个前端共享一个模型
+            "asr_server_port": 50817,  # 识别服务监听端口（仅本机127.0.0.1）
+            "transcript_cache_enabled": True,  # 按音频内容和识别参数缓存识别结果
+            "transcript_cache_max_bytes": 200 * 1024 * 1024,  # 识别结果缓存上限（字节），超出时淘汰最久未使用的结果
+            "cpu_precision": "fp32",  # CPU推理精度：fp32 或 int8（编码器线性层动态量化，量化权重缓存在models/quantized下）
+            "asr_parallel_workers": 1,  # CPU分片并行识别的工作进程数（1为关闭，0为按物理核心数），每个进程各持有一份模型；分声道识别时至少为声道数（不超过物理核心数）
+            "journal_enabled": True,  # 长音频识别时记录已完成的语音段，中断后重新识别同一文件时从断点继续
+            "journal_max_age_days": 7,  # 未完成的识别任务日志保留天数
+            "asr_batch_pool_seconds": 1800,  # 批量识别时汇总语音段的音频总时长上限（秒），达到后先识别已汇总的文件并释放其PCM
+            "asr_batch_size_s": 60,  # 每批补齐后的语音总时长上限（秒），可运行 python calibrate_asr.py 按本机校准
+            "asr_merge_length_s": 15,  # 相邻VAD语音段合并后的最大时长（秒）
+            "vad_max_single_segment_time": 30000,  # VAD单个语音段的最大时长（毫秒）
             
             # 界面配置
             "window_width": 1200,
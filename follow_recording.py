@@ -0,0 +1,58 @@
+"""
+录制中会议的跟随识别 - 会议纪要生成神器
+持续读取正在录制的音频文件，每识别完一个语音段就输出并追加到转写文件
+录制结束后按 Ctrl+C（或等待文件停止增长超过 follow_idle_timeout 秒），程序处理剩余的几秒音频后退出
+
+用法: python follow_recording.py <录音文件> [输出文本文件]
+"""
+
+import sys
+import os
+import threading
+import time
+
+from speech_recognition import speech_recognizer
+
+def main():
+    """主函数"""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    audio_path = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(audio_path)[0] + "_transcript.txt"
+
+    # 等待录音软件创建文件
+    while not os.path.exists(audio_path):
+        print(f"等待录音文件: {audio_path}")
+        time.sleep(2)
+
+    stop_event = threading.Event()
+
+    def on_segment(segment):
+        seconds = int(segment["start"])
+        line = f"[{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}] {segment['text']}"
+        print(line)
+        with open(output_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def on_progress(message, progress):
+        print(message)
+
+    worker = threading.Thread(
+        target=lambda: speech_recognizer.follow_audio(audio_path, stop_event, on_segment, on_progress),
+        daemon=True
+    )
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.5)
+    except KeyboardInterrupt:
+        print("录制结束，正在处理剩余音频...")
+        stop_event.set()
+        worker.join()
+
+    print(f"转写结果已保存到: {output_path}")
+
+if __name__ == "__main__":
+    main()
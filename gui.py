@@ -69,6 +69,10 @@ class MeetingMinutesApp:
         # 初始化表格式界面数据
         self.initialize_meeting_info_fields()
         
+        # 可选：启动时在后台预加载语音识别模型
+        if config.get("model_warmup_on_start", False):
+            speech_recognizer.start_background_warmup()
+        
     def setup_window(self):
         """设置窗口"""
         self.root.title("会议纪要生成神器（本地保密版）V1.0")
@@ -455,18 +459,18 @@ class MeetingMinutesApp:
                     show_topmost_message(self.root, "error", "文件错误", error_msg)
                     return
                 
-                # 新增：判断是否为视频格式，自动转码为mp3
+                # 视频文件只分离音轨（可流复制时不重新编码），识别时再解码到内存
                 file_ext = os.path.splitext(file_path)[1].lower()
                 video_exts = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.wmv', '.mpeg', '.mpg', '.3gp', '.ts', '.flv', '.f4v', '.m4v']
                 if file_ext in video_exts:
                     try:
-                        audio_path = audio_processor.convert_audio(file_path)
+                        audio_path = audio_processor.extract_audio(file_path)
                         self.audio_file_path = audio_path
-                        self.file_path_var.set(os.path.basename(audio_path) + "（已转码）")
-                        self.status_var.set("视频已转音频，准备识别")
+                        self.file_path_var.set(os.path.basename(file_path) + "（已提取音轨）")
+                        self.status_var.set("已提取视频音轨，准备识别")
                         self._is_temp_audio = True  # 标记为临时音频
                     except Exception as e:
-                        show_topmost_message(self.root, "error", "转码失败", f"视频转音频失败: {str(e)}")
+                        show_topmost_message(self.root, "error", "提取失败", f"视频音轨提取失败: {str(e)}")
                         return
                 else:
                     self.audio_file_path = file_path
@@ -486,8 +490,7 @@ class MeetingMinutesApp:
         # 如果是临时转码音频，自动删除
         if hasattr(self, '_is_temp_audio') and self._is_temp_audio and self.audio_file_path:
             try:
-                if os.path.exists(self.audio_file_path):
-                    os.remove(self.audio_file_path)
+                audio_processor.release_temp_file(self.audio_file_path)
             except Exception as e:
                 print(f"删除临时音频文件失败: {e}")
         self.audio_file_path = None
@@ -522,16 +525,26 @@ class MeetingMinutesApp:
                 self.root.after(0, lambda: self.status_var.set(message))
                 self.root.after(0, lambda: self.progress_bar.set(0.1 + progress * 0.8))
             
+            # 识别出的语音段实时追加到文本框，识别过程中即可查看和编辑前面的内容
+            streamed_segments = []
+            
+            def segment_callback(segment):
+                streamed_segments.append(segment)
+                if segment["text"]:
+                    self.root.after(0, lambda: self.transcription_textbox.insert("end", segment["text"]))
+            
             # 进行语音识别
             if self.audio_file_path:  # 确保文件路径不为None
+                self.root.after(0, lambda: self.transcription_textbox.delete("1.0", "end"))
                 transcription = speech_recognizer.recognize_audio(
                     self.audio_file_path, 
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    segment_callback=segment_callback
                 )
                 
-                # 更新界面
-                self.root.after(0, lambda: self.transcription_textbox.delete("1.0", "end"))
-                self.root.after(0, lambda: self.transcription_textbox.insert("1.0", transcription))
+                # 更新界面（已逐段追加的内容保留用户的编辑，不再整体覆盖）
+                if not streamed_segments:
+                    self.root.after(0, lambda: self.transcription_textbox.insert("end", transcription))
                 self.root.after(0, lambda: self.status_var.set(STATUS_MESSAGES['completed']))
                 self.root.after(0, lambda: self.progress_bar.set(1.0))
                 
@@ -540,8 +553,7 @@ class MeetingMinutesApp:
                 # 识别完成后自动删除临时音频文件（如果有）
                 if hasattr(self, '_is_temp_audio') and self._is_temp_audio and self.audio_file_path:
                     try:
-                        if os.path.exists(self.audio_file_path):
-                            os.remove(self.audio_file_path)
+                        audio_processor.release_temp_file(self.audio_file_path)
                     except Exception as e:
                         print(f"删除临时音频文件失败: {e}")
                     self.audio_file_path = None
@@ -0,0 +1,159 @@
+"""
+识别任务日志模块 - 会议纪要生成神器
+长音频识别时把每个已完成语音段的结果追加到任务日志，中断后重新识别同一音频（相同参数）时跳过已完成的语音段
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, List
+
+from config import config
+
+class JobJournal:
+    """单个识别任务的日志（JSON Lines：首行为语音段列表，之后每行为一个已完成语音段的结果）"""
+
+    def __init__(self, journal_file: Path, segments: List[List[int]], done: Dict[int, str]):
+        """
+        初始化任务日志
+
+        Args:
+            journal_file: 日志文件路径
+            segments: 本任务的语音段列表 [[开始毫秒, 结束毫秒], ...]
+            done: 已完成语音段的识别结果 {语音段序号: 文本}
+        """
+        self.journal_file = journal_file
+        self.segments = segments
+        self.done = done
+        self._lock = threading.Lock()
+        self._file = open(journal_file, 'a', encoding='utf-8')
+
+    def record(self, index: int, text: str) -> None:
+        """
+        记录一个已完成的语音段（立即写入磁盘）
+
+        Args:
+            index: 语音段序号
+            text: 识别结果文本
+        """
+        with self._lock:
+            self.done[index] = text
+            self._file.write(json.dumps({"index": index, "text": text}, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """关闭日志文件（保留日志，下次可继续）"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def complete(self) -> None:
+        """任务完成，删除日志"""
+        self.close()
+        self.journal_file.unlink(missing_ok=True)
+
+class JournalStore:
+    """识别任务日志管理类"""
+
+    def __init__(self, journal_dir: Optional[str] = None):
+        """
+        初始化任务日志目录
+
+        Args:
+            journal_dir: 日志目录，如果为None则使用日志目录下的journals
+        """
+        config_log_dir = config.get("log_dir", "logs")
+        if config_log_dir is None:
+            config_log_dir = "logs"
+        self.journal_dir = Path(journal_dir) if journal_dir is not None else Path(config_log_dir) / "journals"
+
+        max_age_days = config.get("journal_max_age_days", 7)
+        self.max_age_days = max_age_days if max_age_days is not None else 7
+
+    def open(self, job_key: str, segments: List[List[int]]) -> JobJournal:
+        """
+        打开任务日志：已有日志且语音段一致时继续上次进度，否则新建
+
+        Args:
+            job_key: 任务标识（音频内容哈希和识别参数）
+            segments: 本次VAD得到的语音段列表
+
+        Returns:
+            任务日志
+        """
+        self.collect_garbage()
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        journal_file = self.journal_dir / f"{job_key}.jsonl"
+
+        done = self._read_done(journal_file, segments)
+        if done is None:
+            with open(journal_file, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"segments": segments}) + "\n")
+            done = {}
+        else:
+            # 程序中断时最后一行可能只写了一半，补上换行避免与新记录连在一起
+            with open(journal_file, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            if done:
+                print(f"发现未完成的识别任务，已完成 {len(done)}/{len(segments)} 个语音段，继续识别")
+        return JobJournal(journal_file, segments, done)
+
+    def load_segments(self, job_key: str) -> Optional[List[List[int]]]:
+        """
+        读取未完成任务记录的语音段列表（继续识别时可跳过VAD）
+
+        Args:
+            job_key: 任务标识
+
+        Returns:
+            语音段列表，没有日志时返回None
+        """
+        journal_file = self.journal_dir / f"{job_key}.jsonl"
+        try:
+            with open(journal_file, 'r', encoding='utf-8') as f:
+                return json.loads(f.readline())["segments"]
+        except Exception:
+            return None
+
+    def collect_garbage(self) -> None:
+        """删除超过保留天数仍未完成的任务日志"""
+        if not self.journal_dir.exists():
+            return
+        expire_before = time.time() - self.max_age_days * 24 * 3600
+        for journal_file in self.journal_dir.glob("*.jsonl"):
+            try:
+                if journal_file.stat().st_mtime < expire_before:
+                    journal_file.unlink()
+            except OSError:
+                continue
+
+    def _read_done(self, journal_file: Path, segments: List[List[int]]) -> Optional[Dict[int, str]]:
+        """读取已完成的语音段，日志不存在或语音段不一致时返回None"""
+        if not journal_file.exists():
+            return None
+        done: Dict[int, str] = {}
+        try:
+            with open(journal_file, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if header.get("segments") != segments:
+                    return None
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 程序中断时最后一行可能只写了一半
+                        continue
+                    if 0 <= entry["index"] < len(segments):
+                        done[entry["index"]] = entry["text"]
+        except Exception as e:
+            print(f"读取识别任务日志失败: {e}")
+            return None
+        return done
+
+# 全局识别任务日志实例
+journal_store = JournalStore()
@@ -3,32 +3,155 @@
 """
 
 import os
+import json
+import hashlib
 from os import path
-import torch
+from pathlib import Path
+import time
+import heapq
 import threading
-from typing import Optional, Callable, List, Dict, Any, Union
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Callable, List, Dict, Any, Union, Tuple
 
 from config import config
+from audio_processor import audio_processor
+from audio_fingerprint import compute_fingerprint, fingerprint_index
+from asr_server import connect_to_server
+from transcript_cache import transcript_cache
+from recognition_journal import JobJournal, journal_store
+
+# speech_model取值与推理后端的对应关系
+ONNX_MODEL_SUFFIX = "-onnx"
+
+# 分片识别工作进程内的模型副本
+_worker_recognizer: Optional["SpeechRecognizer"] = None
+
+def physical_cpu_count() -> int:
+    """获取物理核心数（安装了psutil时精确获取，否则按逻辑核心数的一半估算）"""
+    try:
+        import psutil
+        count = psutil.cpu_count(logical=False)
+        if count:
+            return count
+    except ImportError:
+        pass
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def _init_shard_worker(threads: int, settings: Dict[str, Any], cpu_precision: str) -> None:
+    """
+    分片识别工作进程初始化：同步主进程配置，限制计算线程数并加载本进程的模型副本
+    
+    Args:
+        threads: 本进程的计算线程数
+        settings: 主进程当前的配置（spawn启动的进程重新读取config.json，内存中的修改需显式传入）
+        cpu_precision: 主进程识别器的CPU推理精度
+    """
+    global _worker_recognizer
+    config.default_config.update(settings)
+    recognizer = SpeechRecognizer(use_server=False)
+    recognizer.device = "cpu"
+    recognizer.cpu_precision = cpu_precision
+    recognizer.cpu_threads = threads
+    if recognizer.backend == "pytorch":
+        # 运行时设置线程数，不依赖OMP_NUM_THREADS环境变量（导入torch后再设置环境变量无效）
+        import torch
+        torch.set_num_threads(threads)
+    recognizer.initialize_model()
+    _worker_recognizer = recognizer
+
+def _recognize_shard(inputs: List[np.ndarray], sample_rate: int, batch_size_s: float) -> List[str]:
+    """
+    在工作进程中识别一个分片的语音段
+    
+    Args:
+        inputs: 语音段数组列表
+        sample_rate: 采样率
+        batch_size_s: 每批补齐后的语音总时长上限（秒）
+        
+    Returns:
+        识别文本列表，与inputs顺序一致
+    """
+    recognizer = _worker_recognizer
+    if recognizer is None:
+        raise Exception("分片识别失败: 工作进程模型未初始化")
+    texts = [""] * len(inputs)
+    for batch in recognizer._plan_batches([len(x) * 1000 // sample_rate for x in inputs], batch_size_s):
+        for index, text in zip(batch, recognizer._infer_segments([inputs[i] for i in batch], sample_rate)):
+            texts[index] = text
+    return texts
 
 class SpeechRecognizer:
     """语音识别类"""
     
-    def __init__(self):
-        self.model: Optional[AutoModel] = None
-        self.device: str = "cuda" if torch.cuda.is_available() and config.get("use_gpu", True) else "cpu"
+    def __init__(self, use_server: Optional[bool] = None):
+        """
+        初始化语音识别器
+        
+        Args:
+            use_server: 是否把识别请求发送到常驻识别服务（asr_server.py），为None时使用配置
+        """
+        # 推理后端：pytorch（funasr AutoModel）或 onnx（onnxruntime，无需加载PyTorch）
+        speech_model = config.get("speech_model", "SenseVoiceSmall") or "SenseVoiceSmall"
+        self.backend: str = "onnx" if speech_model.endswith(ONNX_MODEL_SUFFIX) else "pytorch"
+        
+        self.model: Optional[Any] = None
+        self.vad_model: Optional[Any] = None  # ONNX后端的VAD模型（PyTorch后端的VAD由AutoModel持有）
+        
+        # 客户端模式：模型由常驻识别服务持有，本进程不加载模型
+        self.use_server: bool = config.get("asr_server_enabled", False) if use_server is None else use_server
+        
+        # 推理设备：客户端模式下不导入PyTorch，直到需要改用本地模型时才检测
+        self.cuda_available: bool = False
+        self.device: str = "cpu"
+        self._device_detected: bool = False
+        if not self.use_server:
+            self._detect_device()
         self.is_initialized: bool = False
         self.initialization_lock: threading.Lock = threading.Lock()
+        # 推理锁：funasr AutoModel.inference 会改写模型共享的参数字典（含VAD缓存），
+        # 同一模型不能被多个线程（如后台预热和首个识别请求）同时调用
+        self._inference_lock: threading.Lock = threading.Lock()
         
         # 获取本地环境路径，确保不为None
-        self.local_env_path = config.get("local_env_path")
-        if not self.local_env_path:
-            self.local_env_path = "local_env"
-        self.local_env_path = str(self.local_env_path)
+        self.local_env_path: str = str(config.get("local_env_path") or "local_env")
         
         # SenseVoiceSmall模型路径
         self.model_dir: str = path.join(str(self.local_env_path), "meeting-minutes-local", "models", "iic", "SenseVoiceSmall")
+        # FSMN VAD模型路径
+        self.vad_dir: str = path.join(str(self.local_env_path), "meeting-minutes-local", "models", "iic", "speech_fsmn_vad_zh-cn-16k-common-pytorch")
+        self._model_revision: Optional[str] = None
+        
+        # CPU推理精度：fp32（默认）或 int8（对编码器线性层做动态量化）
+        self.cpu_precision: str = config.get("cpu_precision", "fp32") or "fp32"
+        # CPU计算线程数（None表示使用全部核心，分片识别工作进程中按进程数均分）
+        self.cpu_threads: Optional[int] = None
+        
+        # 最近一次识别的统计信息（静音裁剪比例、时间映射表等）
+        self.last_recognition_stats: Dict[str, Any] = {}
+        
+        # 分片识别的工作进程池（每个进程持有一份模型副本，首次使用时创建）
+        self._shard_pool: Optional[ProcessPoolExecutor] = None
+        self._shard_pool_size: int = 0
+        
+        # 识别实时率记录文件的读写锁（识别服务中多个线程可能同时更新）
+        self._rtf_lock: threading.Lock = threading.Lock()
+        
+        # 后台预热状态：idle（未启动）/ loading（加载模型）/ warming（试运行推理）/ ready / failed
+        self.warmup_state: str = "idle"
+        self.warmup_error: Optional[str] = None
+        self.warmup_thread: Optional[threading.Thread] = None
+    
+    def _detect_device(self) -> None:
+        """检测CUDA是否可用并选择推理设备（PyTorch和funasr只在PyTorch后端下导入）"""
+        if self._device_detected:
+            return
+        if self.backend == "pytorch":
+            import torch
+            self.cuda_available = torch.cuda.is_available()
+        self.device = "cuda" if self.cuda_available and config.get("use_gpu", True) else "cpu"
+        self._device_detected = True
         
     def initialize_model(self, progress_callback: Optional[Callable[[str, float], None]] = None) -> None:
         """
@@ -39,12 +162,17 @@ class SpeechRecognizer:
         """
         if self.is_initialized:
             return
+        
+        if self.warmup_state == "loading" and progress_callback:
+            # 后台预热正在加载模型，等待其完成而不是重复加载
+            progress_callback("模型正在后台预加载，请稍候...", 0.1)
             
         with self.initialization_lock:
             if self.is_initialized:  # 双重检查
                 return
                 
             try:
+                self._detect_device()
                 if progress_callback:
                     progress_callback("正在加载语音识别模型...", 0.1)
                 
@@ -56,79 +184,1159 @@ class SpeechRecognizer:
                     progress_callback("正在初始化模型...", 0.3)
                 
                 # 初始化模型
-                vad_dir = os.path.join(str(self.local_env_path), "meeting-minutes-local", "models", "iic", "speech_fsmn_vad_zh-cn-16k-common-pytorch")
+                vad_dir = self.vad_dir
                 required_files = ["model.pt", "config.yaml"]
                 missing_files = [f for f in required_files if not os.path.exists(os.path.join(vad_dir, f))]
                 if not os.path.exists(vad_dir) or missing_files:
                     raise Exception(f"本地VAD模型不完整，请检查目录：{vad_dir}，缺失文件: {missing_files}")
-                self.model = AutoModel(
-                    model=self.model_dir,
-                    trust_remote_code=True,
-                    remote_code="./model.py",
-                    vad_model=vad_dir,
-                    vad_kwargs={"max_single_segment_time": 30000},
-                    device=f"{self.device}" if self.device == "cpu" else "cuda:0",
-                    disable_update=True
-                )
+                if self.backend == "onnx":
+                    self._initialize_onnx_model(progress_callback)
+                else:
+                    self._load_pytorch_model(vad_dir)
+                    
+                    if self.device == "cpu" and self.cpu_precision == "int8":
+                        if progress_callback:
+                            progress_callback("正在加载int8量化模型...", 0.8)
+                        if not self._quantize_encoder():
+                            # 量化缓存损坏时编码器可能已被部分替换，重新加载模型后重新量化
+                            self._load_pytorch_model(vad_dir)
+                            self._quantize_encoder()
                 
                 if progress_callback:
                     progress_callback("模型加载完成", 1.0)
                 
                 self.is_initialized = True
-                print(f"语音识别模型已加载到设备: {self.device}")
+                print(f"语音识别模型已加载到设备: {self.device}（{self.backend}后端）")
                 
             except Exception as e:
                 print(f"模型初始化失败: {e}")
                 raise Exception(f"语音识别模型初始化失败: {str(e)}")
     
-    def recognize_audio(self, audio_path: str, progress_callback: Optional[Callable[[str, float], None]] = None) -> str:
+    def _initialize_onnx_model(self, progress_callback: Optional[Callable[[str, float], None]] = None) -> None:
+        """
+        加载ONNX Runtime后端：模型目录中没有ONNX文件时由funasr_onnx导出一次（仅导出时需要PyTorch）
+        
+        Args:
+            progress_callback: 进度回调函数
+        """
+        try:
+            from funasr_onnx import SenseVoiceSmall as OnnxSenseVoiceSmall, Fsmn_vad
+        except ImportError:
+            raise Exception("未安装ONNX后端依赖，请运行 pip install \"funasr-onnx>=0.4.3\" onnxruntime")
+        
+        quantize = self.cpu_precision == "int8"
+        model_file = "model_quant.onnx" if quantize else "model.onnx"
+        if progress_callback and not path.exists(path.join(self.model_dir, model_file)):
+            progress_callback("首次使用ONNX后端，正在导出模型（仅需一次）...", 0.4)
+        
+        threads = self.cpu_threads or os.cpu_count() or 4
+        self.model = OnnxSenseVoiceSmall(self.model_dir, batch_size=1, quantize=quantize, intra_op_num_threads=threads)
+        vad_model = Fsmn_vad(self.vad_dir, quantize=False, intra_op_num_threads=threads)
+        if not hasattr(vad_model, "vad_scorer_config"):
+            raise Exception("funasr-onnx版本过低，请运行 pip install -U \"funasr-onnx>=0.4.3\"")
+        # 每次检测时按此配置重新创建VAD状态，与PyTorch后端使用相同的最大语音段时长
+        vad_model.vad_scorer_config["max_single_segment_time"] = self._vad_max_segment_ms()
+        self.vad_model = vad_model
+    
+    def _load_pytorch_model(self, vad_dir: str) -> None:
+        """
+        加载funasr AutoModel（识别模型和VAD模型）
+        
+        Args:
+            vad_dir: VAD模型目录
+        """
+        from funasr import AutoModel
+        self.model = AutoModel(
+            model=self.model_dir,
+            trust_remote_code=True,
+            remote_code="./model.py",
+            vad_model=vad_dir,
+            vad_kwargs={"max_single_segment_time": self._vad_max_segment_ms()},
+            device=f"{self.device}" if self.device == "cpu" else "cuda:0",
+            disable_update=True
+        )
+    
+    def _quantized_cache_file(self) -> Path:
+        """获取量化权重缓存文件路径（按模型版本区分，模型更新后自动重新量化）"""
+        cache_dir = Path(self.local_env_path) / "meeting-minutes-local" / "models" / "quantized"
+        return cache_dir / f"SenseVoiceSmall_encoder_int8_{self.get_model_revision()}.pt"
+    
+    def _quantize_encoder(self) -> bool:
+        """
+        对SenseVoice编码器的线性层做动态int8量化，量化后的权重缓存到磁盘，之后启动直接加载
+        
+        Returns:
+            是否完成量化；读取缓存失败时删除缓存并返回False，需重新加载模型后再次调用
+        """
+        import torch
+        if self.model is None:
+            raise Exception("模型未初始化")
+        encoder = self.model.model.encoder
+        cache_file = self._quantized_cache_file()
+        start_time = time.time()
+        
+        if cache_file.exists():
+            try:
+                state_dict = torch.load(str(cache_file), map_location="cpu", weights_only=True)
+                self._replace_linear_with_dynamic(encoder)
+                encoder.load_state_dict(state_dict)
+                print(f"已加载int8量化权重缓存，耗时 {time.time() - start_time:.1f}秒")
+                return True
+            except Exception as e:
+                # 缓存与当前模型结构不一致时编码器可能已被部分替换，删除缓存后需重新加载模型
+                cache_file.unlink(missing_ok=True)
+                print(f"读取量化权重缓存失败，已删除缓存，重新加载模型后重新量化: {e}")
+                return False
+        
+        torch.ao.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            partial_file = cache_file.with_suffix(".partial")
+            torch.save(encoder.state_dict(), str(partial_file))
+            os.replace(partial_file, cache_file)
+        except Exception as e:
+            print(f"保存量化权重缓存失败: {e}")
+        print(f"编码器已完成int8动态量化，耗时 {time.time() - start_time:.1f}秒")
+        return True
+    
+    @staticmethod
+    def _replace_linear_with_dynamic(module: Any) -> None:
+        """把模块中的nn.Linear替换为同尺寸的动态量化Linear（权重随后由load_state_dict填充）"""
+        import torch
+        for name, child in module.named_children():
+            if type(child) is torch.nn.Linear:
+                setattr(module, name, torch.ao.nn.quantized.dynamic.Linear(
+                    child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8))
+            else:
+                SpeechRecognizer._replace_linear_with_dynamic(child)
+    
+    def start_background_warmup(self) -> None:
+        """在后台线程中加载模型并运行一次短推理，使首次识别无需等待模型加载"""
+        if self.use_server or self.is_initialized or (self.warmup_thread is not None and self.warmup_thread.is_alive()):
+            return
+        self.warmup_state = "loading"
+        self.warmup_error = None
+        self.warmup_thread = threading.Thread(target=self._warmup, name="asr-warmup", daemon=True)
+        self.warmup_thread.start()
+    
+    def _warmup(self) -> None:
+        """预热线程：加载VAD和识别模型，并用1秒合成音频分别试运行一次"""
+        try:
+            start_time = time.time()
+            self.initialize_model()
+            self.warmup_state = "warming"
+            
+            sample_rate = config.get("audio_sample_rate", 16000) or 16000
+            t = np.arange(sample_rate, dtype=np.float32) / sample_rate
+            samples = (0.1 * np.sin(2 * np.pi * 220 * t) * np.sin(np.pi * t)).astype(np.float32)
+            self._run_vad(samples, sample_rate)
+            # 直接送入识别模型，不依赖VAD是否检出语音
+            self._transcribe_segments(samples, [[0, 1000]], sample_rate)
+            
+            self.warmup_state = "ready"
+            print(f"语音识别模型预热完成，耗时 {time.time() - start_time:.1f}秒")
+        except Exception as e:
+            self.warmup_state = "failed"
+            self.warmup_error = str(e)
+            print(f"语音识别模型预热失败: {e}")
+    
+    def recognize_audio(self, audio_path: Union[str, np.ndarray], progress_callback: Optional[Callable[[str, float], None]] = None,
+                        segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
         """
         识别音频文件
         
         Args:
-            audio_path: 音频文件路径
+            audio_path: 音频文件路径，或已解码的PCM数组（采样率为audio_sample_rate，多声道为 (样本数, 声道数)）
+            progress_callback: 进度回调函数
+            segment_callback: 语音段回调函数，按时间顺序在每段识别完成后立即调用，
+                参数为 {"start": 秒, "end": 秒, "text": 文本}，各段文本依次拼接即为完整结果
+            
+        Returns:
+            识别结果文本
+        """
+        if self.use_server:
+            text = self._recognize_remote(audio_path, progress_callback, segment_callback)
+            if text is not None:
+                return text
+        
+        try:
+            # 识别参数中的推理精度取决于设备（客户端模式改用本地模型时才检测）
+            self._detect_device()
+            sample_rate = config.get("audio_sample_rate", 16000) or 16000
+            split_channels = bool(config.get("asr_split_channels", False))
+            settings = self._recognition_settings()
+            
+            # 任务标识：同一文件、同样的模型和参数，用于结果缓存和中断后继续识别
+            job_key = None
+            if isinstance(audio_path, str) and (config.get("transcript_cache_enabled", True) or config.get("journal_enabled", True)):
+                job_key = transcript_cache.make_key(audio_processor.file_content_hash(audio_path), settings)
+            
+            # 识别结果缓存：同一文件、同样的模型和参数直接返回上次的结果
+            cache_key = None
+            if job_key is not None and config.get("transcript_cache_enabled", True):
+                cache_key = job_key
+                cached_text = transcript_cache.get(cache_key)
+                if cached_text is not None:
+                    if progress_callback:
+                        progress_callback("已从缓存读取识别结果", 1.0)
+                    if segment_callback:
+                        segment_callback({"start": 0.0, "end": 0.0, "text": cached_text})
+                    return cached_text
+            
+            if isinstance(audio_path, str):
+                channel_count = audio_processor.get_channel_count(audio_path) if split_channels else 1
+                if progress_callback:
+                    progress_callback("正在解码音频...", 0.3)
+                # 直接解码为内存PCM（或读取解码缓存），避免先转码为临时MP3再由模型二次解码
+                audio_input = audio_processor.load_pcm(audio_path, sample_rate=sample_rate, channels=channel_count)
+            else:
+                audio_input = audio_path
+                if audio_input.ndim > 1 and not split_channels:
+                    audio_input = audio_input.mean(axis=1).astype(np.float32)
+            
+            audio_seconds = audio_input.shape[0] / sample_rate
+            
+            # 重复录音检测：与已识别录音的指纹匹配时直接复用结果，无需加载模型
+            fingerprint = None
+            if config.get("duplicate_detection_enabled", True):
+                fingerprint = compute_fingerprint(audio_input, sample_rate)
+                match = fingerprint_index.find_match(fingerprint, audio_seconds, settings, samples=audio_input, sample_rate=sample_rate)
+                if match is not None:
+                    if progress_callback:
+                        progress_callback("检测到重复录音，已复用之前的识别结果", 1.0)
+                    if segment_callback:
+                        segment_callback({"start": 0.0, "end": audio_seconds, "text": match["transcript"]})
+                    if cache_key is not None:
+                        transcript_cache.put(cache_key, match["transcript"],
+                                             source=audio_path if isinstance(audio_path, str) else None)
+                    return match["transcript"]
+            
+            if not self.is_initialized or self.model is None:
+                self.initialize_model(progress_callback)
+                if self.model is None:
+                    raise Exception("模型初始化失败")
+            
+            if audio_input.ndim > 1 and audio_input.shape[1] > 1:
+                # 多轨录音按声道分别识别，再按时间合并
+                segments = self.recognize_channels(audio_input, progress_callback)
+                text = self.format_channel_transcript(segments)
+                if segment_callback:
+                    # 各声道并行识别，合并排序后统一输出
+                    for i, (segment, line) in enumerate(zip(segments, text.split("\n"))):
+                        segment_callback({"start": segment["start"], "end": segment["end"], "text": ("\n" if i else "") + line})
+                self.last_recognition_stats = {"audio_seconds": audio_seconds, "channels": audio_input.shape[1], "segments": len(segments)}
+            else:
+                if audio_input.ndim > 1:
+                    audio_input = audio_input[:, 0]
+                owns_buffer = isinstance(audio_path, str)
+                journal_key = job_key if config.get("journal_enabled", True) else None
+                text = self._recognize_mono(audio_input, owns_buffer, progress_callback, segment_callback, journal_key)
+            
+            if progress_callback:
+                progress_callback("识别完成", 1.0)
+            
+            if fingerprint is not None and text:
+                fingerprint_index.add(fingerprint, audio_seconds, settings, text,
+                                      source=audio_path if isinstance(audio_path, str) else None)
+            if cache_key is not None:
+                transcript_cache.put(cache_key, text, source=audio_path if isinstance(audio_path, str) else None)
+            return text
+                
+        except Exception as e:
+            print(f"语音识别失败: {e}")
+            raise Exception(f"语音识别失败: {str(e)}")
+    
+    def _recognize_remote(self, audio_path: Union[str, np.ndarray],
+                          progress_callback: Optional[Callable[[str, float], None]] = None,
+                          segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[str]:
+        """
+        通过常驻识别服务识别音频（文件路径直接发送，PCM数组按值发送）
+        
+        Args:
+            audio_path: 音频文件路径或PCM数组
+            progress_callback: 进度回调函数
+            segment_callback: 语音段回调函数
+            
+        Returns:
+            识别结果文本，无法连接服务时返回None（改用本地模型）
+        """
+        try:
+            conn = connect_to_server()
+        except Exception as e:
+            print(f"无法连接语音识别服务，改用本地模型: {e}")
+            return None
+        
+        try:
+            request: Dict[str, Any] = {"command": "recognize"}
+            if isinstance(audio_path, str):
+                request["path"] = os.path.abspath(audio_path)
+            else:
+                request["pcm"] = np.asarray(audio_path, dtype=np.float32)
+            request["stream_segments"] = segment_callback is not None
+            conn.send(request)
+            while True:
+                message = conn.recv()
+                if message["type"] == "progress":
+                    if progress_callback:
+                        progress_callback(message["message"], message["progress"])
+                elif message["type"] == "segment":
+                    if segment_callback:
+                        segment_callback(message["segment"])
+                elif message["type"] == "result":
+                    self.last_recognition_stats = message.get("stats", {})
+                    return message["text"]
+                else:
+                    raise Exception(message.get("error", "未知错误"))
+        except Exception as e:
+            print(f"语音识别服务返回错误: {e}")
+            raise Exception(f"语音识别失败: {str(e)}")
+        finally:
+            conn.close()
+    
+    def _recognize_mono(self, audio_input: np.ndarray, owns_buffer: bool,
+                        progress_callback: Optional[Callable[[str, float], None]] = None,
+                        segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        job_key: Optional[str] = None) -> str:
+        """
+        识别单声道PCM（可选静音裁剪和响度标准化）
+        
+        Args:
+            audio_input: float32 单声道PCM数组
+            owns_buffer: 缓冲区是否由识别器自行解码（可原地修改）
             progress_callback: 进度回调函数
+            segment_callback: 语音段回调函数（时间戳已还原到裁剪前的原始音频）
+            job_key: 任务标识，给出时把已完成的语音段记录到任务日志，中断后重新识别时从断点继续
             
         Returns:
             识别结果文本
         """
+        if self.model is None:
+            raise Exception("模型未初始化")
+        sample_rate = config.get("audio_sample_rate", 16000) or 16000
+        audio_seconds = audio_input.shape[0] / sample_rate
+        stats: Dict[str, Any] = {"audio_seconds": audio_seconds, "trimmed_seconds": 0.0, "trim_ratio": 0.0, "offset_map": [(0.0, 0.0, audio_seconds)]}
+        if config.get("asr_trim_silence", False):
+            # 识别前去除长静音段，时间映射表用于把识别时间戳还原到原始音频
+            min_silence = config.get("asr_trim_min_silence", 2.0) or 2.0
+            audio_input, offset_map = audio_processor.trim_silence(audio_input, sample_rate=sample_rate, min_silence_seconds=min_silence)
+            trimmed_seconds = audio_seconds - audio_input.shape[0] / sample_rate
+            trim_ratio = trimmed_seconds / audio_seconds if audio_seconds > 0 else 0.0
+            stats.update({"trimmed_seconds": trimmed_seconds, "trim_ratio": trim_ratio, "offset_map": offset_map})
+            print(f"静音裁剪: 去除 {trimmed_seconds:.1f}秒 / {audio_seconds:.1f}秒（{trim_ratio:.1%}）")
+            if progress_callback:
+                progress_callback(f"已跳过 {trim_ratio:.0%} 的静音，正在识别...", 0.4)
+        self.last_recognition_stats = stats
+        
+        if config.get("asr_normalize_audio", False):
+            # 在内存中标准化响度，自行解码的可写缓冲区可原地修改（缓存映射为只读）
+            in_place = (owns_buffer or stats["trimmed_seconds"] > 0) and audio_input.flags.writeable
+            audio_input = audio_processor.normalize_pcm(audio_input, sample_rate=sample_rate, in_place=in_place)
+        
+        if progress_callback:
+            progress_callback("正在检测语音段...", 0.5)
+        
+        # 先运行VAD，再逐批识别语音段，以便按已完成的语音时长汇报进度
+        # 继续未完成的任务时直接使用日志中记录的语音段，跳过VAD
+        segments = journal_store.load_segments(job_key) if job_key is not None else None
+        if segments is None:
+            segments = self._run_vad(audio_input, sample_rate)
+        journal = journal_store.open(job_key, segments) if job_key is not None else None
+        
+        emit_segment: Optional[Callable[[Dict[str, Any]], None]] = None
+        if segment_callback:
+            offset_map = stats["offset_map"]
+            
+            def emit_original_time(result: Dict[str, Any]) -> None:
+                segment_callback({
+                    "start": audio_processor.map_trimmed_time(result["start"], offset_map),
+                    "end": audio_processor.map_trimmed_time(result["end"], offset_map),
+                    "text": result["text"]
+                })
+            emit_segment = emit_original_time
+        
+        workers = self._shard_workers()
+        try:
+            if workers > 1 and len(segments) > 1:
+                results = self._transcribe_segments_sharded(audio_input, segments, sample_rate, workers,
+                                                            progress_callback=progress_callback, segment_callback=emit_segment,
+                                                            journal=journal)
+            else:
+                results = self._transcribe_segments(audio_input, segments, sample_rate, progress_callback=progress_callback,
+                                                    segment_callback=emit_segment, journal=journal)
+        finally:
+            if journal is not None:
+                # 识别中断时保留日志，下次从断点继续
+                journal.close()
+        if journal is not None:
+            journal.complete()
+        return "".join(result["text"] for result in results)
+    
+    def recognize_channels(self, audio_input: np.ndarray,
+                           progress_callback: Optional[Callable[[str, float], None]] = None) -> List[Dict[str, Any]]:
+        """
+        多声道录音按声道分别识别，结果按时间合并
+        CPU推理时各声道的语音段由多个工作进程（各自持有模型副本，进程数至少为声道数与物理核心数中的较小值）并行识别；
+        GPU推理（或只有一个物理核心）时共用一份模型，各声道的语音段汇总后按时长分批，同一批中包含多个声道的语音段
+        每个声道在VAD时复制为连续数组（VAD前端提取特征时本身也会复制），一次只复制一个声道
+        
+        Args:
+            audio_input: float32 PCM数组，形状为 (样本数, 声道数)
+            progress_callback: 进度回调函数
+            
+        Returns:
+            语音段列表 [{"start": 秒, "end": 秒, "text": 文本, "channel": 声道序号}, ...]，按开始时间排序
+        """
         if not self.is_initialized or self.model is None:
             self.initialize_model(progress_callback)
-            if self.model is None:
-                raise Exception("模型初始化失败")
         
+        sample_rate = config.get("audio_sample_rate", 16000) or 16000
+        channel_count = audio_input.shape[1]
+        workers = self._shard_workers()
+        if self.device == "cpu" and channel_count > 1:
+            # 分声道识别时每个声道至少分到一个模型副本，不受 asr_parallel_workers 关闭的影响
+            workers = max(workers, min(channel_count, physical_cpu_count()))
+        
+        if progress_callback:
+            progress_callback(f"正在分声道识别（{channel_count} 个声道）...", 0.5)
+        channel_segments = [self._run_vad(audio_input[:, channel], sample_rate) for channel in range(channel_count)]
+        
+        # 各声道的语音段汇总后一起分批（或分片）识别
+        pool = [(channel, segment) for channel, segments in enumerate(channel_segments) for segment in segments]
+        channel_samples = {channel: audio_input[:, channel] for channel in range(channel_count)}
+        channel_texts: Dict[int, List[str]] = {}
+        errors: Dict[int, str] = {}
+        self._transcribe_pool(pool, channel_samples, sample_rate, channel_texts, errors, progress_callback, 0.75, workers)
+        if errors:
+            channel, error = next(iter(errors.items()))
+            raise Exception(f"声道{channel + 1}识别失败: {error}")
+        
+        merged: List[Dict[str, Any]] = []
+        for channel, segments in enumerate(channel_segments):
+            for (begin, end), text in zip(segments, channel_texts.get(channel, [])):
+                if text:
+                    merged.append({"start": begin / 1000, "end": end / 1000, "text": text, "channel": channel})
+        merged.sort(key=lambda segment: (segment["start"], segment["channel"]))
+        return merged
+    
+    def format_channel_transcript(self, segments: List[Dict[str, Any]]) -> str:
+        """
+        将分声道识别结果格式化为按时间排列的文本
+        
+        Args:
+            segments: recognize_channels返回的语音段列表
+            
+        Returns:
+            每行形如 "[00:01:23] 声道1：文本" 的识别文本
+        """
+        lines = []
+        for segment in segments:
+            seconds = int(segment["start"])
+            timestamp = f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+            lines.append(f"[{timestamp}] 声道{segment['channel'] + 1}：{segment['text']}")
+        return "\n".join(lines)
+    
+    def _run_vad(self, samples: np.ndarray, sample_rate: int) -> List[List[int]]:
+        """
+        运行VAD模型，并把相邻的短语音段合并到 asr_merge_length_s 以内
+        
+        Args:
+            samples: float32 单声道PCM数组
+            sample_rate: 采样率
+            
+        Returns:
+            语音段列表 [[开始毫秒, 结束毫秒], ...]
+        """
+        return self._merge_vad_segments(self._detect_speech(samples, sample_rate), self._merge_length_ms())
+    
+    def _detect_speech(self, samples: np.ndarray, sample_rate: int) -> List[List[int]]:
+        """
+        运行VAD模型（不合并）
+        
+        Args:
+            samples: float32 单声道PCM数组
+            sample_rate: 采样率
+            
+        Returns:
+            VAD输出的语音段列表 [[开始毫秒, 结束毫秒], ...]
+        """
+        if self.model is None:
+            raise Exception("模型未初始化")
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        with self._inference_lock:
+            if self.backend == "onnx":
+                if self.vad_model is None:
+                    raise Exception("VAD模型未初始化")
+                result = self.vad_model(samples)
+                segments = result[0] if result else []
+            else:
+                # 传入参数字典的副本，inference会在其中写入本次调用的cache等参数
+                result = self.model.inference(
+                    samples,
+                    model=self.model.vad_model,
+                    kwargs=dict(self.model.vad_kwargs),
+                    cache={},
+                    fs=sample_rate,
+                )
+                segments = result[0]["value"] if result else []
+        return segments
+    
+    @staticmethod
+    def _merge_vad_segments(segments: List[List[int]], max_length_ms: int) -> List[List[int]]:
+        """
+        合并相邻的VAD语音段，使每段不超过max_length_ms（与funasr的merge_vad规则一致）
+        
+        Args:
+            segments: 语音段列表 [[开始毫秒, 结束毫秒], ...]
+            max_length_ms: 合并后单段最大时长（毫秒）
+            
+        Returns:
+            合并后的语音段列表
+        """
+        if len(segments) <= 1:
+            return [[int(segment[0]), int(segment[1])] for segment in segments]
+        time_steps = sorted(set([segment[0] for segment in segments] + [segment[1] for segment in segments]))
+        merged = []
+        begin = 0
+        for i in range(len(time_steps) - 1):
+            if time_steps[i + 1] - begin < max_length_ms:
+                continue
+            if time_steps[i] - begin > 0:
+                merged.append([begin, time_steps[i]])
+            begin = time_steps[i]
+        merged.append([begin, time_steps[-1]])
+        return [[int(begin), int(end)] for begin, end in merged]
+    
+    def _transcribe_segments(self, samples: np.ndarray, segments: List[List[int]], sample_rate: int,
+                             batch_size_s: Optional[float] = None,
+                             progress_callback: Optional[Callable[[str, float], None]] = None,
+                             segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             journal: Optional[JobJournal] = None) -> List[Dict[str, Any]]:
+        """
+        按时长分组批量识别VAD语音段
+        
+        Args:
+            samples: float32 单声道PCM数组
+            segments: 语音段列表 [[开始毫秒, 结束毫秒], ...]
+            sample_rate: 采样率
+            batch_size_s: 每批补齐后的语音总时长上限（秒），为None时使用配置 asr_batch_size_s
+            progress_callback: 进度回调函数（每批完成后按已识别语音时长汇报进度和预计剩余时间，范围0.55-1.0）
+            segment_callback: 语音段回调函数，给出时按时间顺序分批并在每批完成后逐段调用
+            journal: 任务日志（跳过其中已完成的语音段，并记录新完成的语音段）
+            
+        Returns:
+            识别结果列表 [{"start": 秒, "end": 秒, "text": 文本}, ...]，与segments顺序一致
+        """
+        if batch_size_s is None:
+            batch_size_s = self._batch_size_s()
+        durations = [end - begin for begin, end in segments]
+        texts: List[Optional[str]] = [None] * len(segments)
+        if journal is not None:
+            for index, text in journal.done.items():
+                texts[index] = text
+        pending = [index for index, text in enumerate(texts) if text is None]
+        
+        total_seconds = sum(durations) / 1000
+        done_seconds = total_seconds - sum(durations[index] for index in pending) / 1000
+        done_segments = len(segments) - len(pending)
+        processed_seconds = 0.0
+        emitted = 0
+        known_rtf = self._load_realtime_factor()
+        if progress_callback and segments:
+            message = f"检测到 {len(segments)} 个语音段，"
+            if done_segments:
+                message += f"已从中断处恢复 {done_segments} 个，"
+            if known_rtf is not None:
+                message += f"预计需要{self._format_eta((total_seconds - done_seconds) * known_rtf)}，"
+            progress_callback(message + "正在识别...", 0.55 + 0.45 * done_seconds / max(total_seconds, 1e-9))
+        
+        start_time = time.time()
+        # 需要按时间顺序输出时，相邻语音段组成一批（补齐略多），否则按时长分组
+        for batch in self._plan_batches([durations[index] for index in pending], batch_size_s, in_order=segment_callback is not None):
+            batch = [pending[position] for position in batch]
+            inputs = [self._segment_samples(samples, segments[index], sample_rate) for index in batch]
+            for index, text in zip(batch, self._infer_segments(inputs, sample_rate)):
+                texts[index] = text
+                if journal is not None:
+                    journal.record(index, text)
+            # 输出从头开始已连续完成的语音段
+            while segment_callback and emitted < len(segments) and texts[emitted] is not None:
+                begin, end = segments[emitted]
+                segment_callback({"start": begin / 1000, "end": end / 1000, "text": texts[emitted]})
+                emitted += 1
+            done_segments += len(batch)
+            batch_seconds = sum(durations[index] for index in batch) / 1000
+            done_seconds += batch_seconds
+            processed_seconds += batch_seconds
+            if progress_callback and total_seconds > 0:
+                # 用本次已测得的实时率估算剩余时间
+                rtf = (time.time() - start_time) / processed_seconds if processed_seconds > 0 else known_rtf
+                message = f"正在识别语音段 {done_segments}/{len(segments)}"
+                if rtf is not None and done_segments < len(segments):
+                    message += f"，预计剩余{self._format_eta((total_seconds - done_seconds) * rtf)}"
+                progress_callback(message, 0.55 + 0.45 * done_seconds / total_seconds)
+        
+        while segment_callback and emitted < len(segments):
+            # 全部语音段均已在上次完成时，按顺序输出
+            begin, end = segments[emitted]
+            segment_callback({"start": begin / 1000, "end": end / 1000, "text": texts[emitted]})
+            emitted += 1
+        
+        if processed_seconds >= 10:
+            # 太短的音频受固定开销影响，实时率不具代表性
+            self._save_realtime_factor((time.time() - start_time) / processed_seconds)
+        return [{"start": begin / 1000, "end": end / 1000, "text": text or ""} for (begin, end), text in zip(segments, texts)]
+    
+    def _shard_workers(self) -> int:
+        """
+        分片识别的工作进程数（asr_parallel_workers：1为关闭，0为按物理核心数），仅CPU推理时启用
+        
+        Returns:
+            工作进程数，1表示不分片
+        """
+        if self.device != "cpu":
+            return 1
+        workers = config.get("asr_parallel_workers", 1)
+        if workers is None:
+            workers = 1
+        if workers <= 0:
+            workers = physical_cpu_count()
+        return max(1, int(workers))
+    
+    def _transcribe_segments_sharded(self, samples: np.ndarray, segments: List[List[int]], sample_rate: int, workers: int,
+                                     batch_size_s: Optional[float] = None,
+                                     progress_callback: Optional[Callable[[str, float], None]] = None,
+                                     segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                     journal: Optional[JobJournal] = None) -> List[Dict[str, Any]]:
+        """
+        按时长均衡地把语音段分成多个分片，由多个工作进程（各自持有模型副本）并行识别，再按时间顺序合并
+        
+        Args:
+            samples: float32 单声道PCM数组
+            segments: 语音段列表 [[开始毫秒, 结束毫秒], ...]
+            sample_rate: 采样率
+            workers: 工作进程数
+            batch_size_s: 每批补齐后的语音总时长上限（秒），为None时使用配置 asr_batch_size_s
+            progress_callback: 进度回调函数（每个分片完成后汇报，范围0.55-1.0）
+            segment_callback: 语音段回调函数（已完成的语音段按时间顺序输出）
+            journal: 任务日志（跳过其中已完成的语音段，并记录新完成的语音段）
+            
+        Returns:
+            识别结果列表 [{"start": 秒, "end": 秒, "text": 文本}, ...]，与segments顺序一致
+        """
+        if batch_size_s is None:
+            batch_size_s = self._batch_size_s()
+        durations = [end - begin for begin, end in segments]
+        texts: List[Optional[str]] = [None] * len(segments)
+        if journal is not None:
+            for index, text in journal.done.items():
+                texts[index] = text
+        pending = [index for index, text in enumerate(texts) if text is None]
+        if not pending:
+            return self._transcribe_segments(samples, segments, sample_rate, batch_size_s,
+                                             progress_callback, segment_callback, journal)
+        
+        shards = [[pending[position] for position in shard]
+                  for shard in self._balance_shards([durations[index] for index in pending], workers)]
+        total_ms = max(1, sum(durations))
+        pending_ms = sum(durations[index] for index in pending)
+        pool = self._get_shard_pool(len(shards))
+        
+        if progress_callback:
+            message = f"检测到 {len(segments)} 个语音段，"
+            if len(pending) < len(segments):
+                message += f"已从中断处恢复 {len(segments) - len(pending)} 个，"
+            progress_callback(message + f"正在用 {len(shards)} 个进程并行识别...", 0.55 + 0.45 * (total_ms - pending_ms) / total_ms)
+        
+        start_time = time.time()
+        futures = {
+            pool.submit(_recognize_shard, [self._segment_samples(samples, segments[i], sample_rate) for i in shard],
+                        sample_rate, batch_size_s): shard
+            for shard in shards
+        }
+        done_ms = total_ms - pending_ms
+        emitted = 0
         try:
-            if progress_callback:
-                progress_callback("正在识别音频...", 0.5)
+            for future in as_completed(futures):
+                shard = futures[future]
+                for index, text in zip(shard, future.result()):
+                    texts[index] = text
+                    if journal is not None:
+                        journal.record(index, text)
+                done_ms += sum(durations[i] for i in shard)
+                if progress_callback:
+                    progress_callback(f"已完成 {done_ms / total_ms:.0%} 的语音识别", 0.55 + 0.45 * done_ms / total_ms)
+                # 输出从头开始已连续完成的语音段
+                while segment_callback and emitted < len(segments) and texts[emitted] is not None:
+                    begin, end = segments[emitted]
+                    segment_callback({"start": begin / 1000, "end": end / 1000, "text": texts[emitted]})
+                    emitted += 1
+        except Exception as e:
+            # 工作进程异常退出后进程池不可再用，下次重新创建
+            for future in futures:
+                future.cancel()
+            self._shutdown_shard_pool()
+            raise Exception(f"并行识别失败: {str(e)}")
+        
+        if pending_ms >= 10000:
+            self._save_realtime_factor((time.time() - start_time) / (pending_ms / 1000))
+        return [{"start": begin / 1000, "end": end / 1000, "text": text or ""} for (begin, end), text in zip(segments, texts)]
+    
+    @staticmethod
+    def _balance_shards(durations_ms: List[int], shard_count: int) -> List[List[int]]:
+        """
+        按时长把语音段分配到各分片（从最长的段开始，每次分给当前总时长最短的分片）
+        
+        Args:
+            durations_ms: 各语音段时长（毫秒）
+            shard_count: 分片数
             
-            # 执行语音识别
-            result = self.model.generate(
-                input=audio_path,
+        Returns:
+            非空分片列表，每个分片为按时间顺序排列的语音段序号列表
+        """
+        heap = [(0, shard) for shard in range(min(shard_count, len(durations_ms)))]
+        shards: List[List[int]] = [[] for _ in heap]
+        for index in sorted(range(len(durations_ms)), key=lambda i: durations_ms[i], reverse=True):
+            load, shard = heapq.heappop(heap)
+            shards[shard].append(index)
+            heapq.heappush(heap, (load + durations_ms[index], shard))
+        return [sorted(shard) for shard in shards if shard]
+    
+    def _get_shard_pool(self, workers: int) -> ProcessPoolExecutor:
+        """获取分片识别进程池，进程数变化时重新创建"""
+        if self._shard_pool is None or self._shard_pool_size != workers:
+            self._shutdown_shard_pool()
+            threads = max(1, physical_cpu_count() // workers)
+            print(f"正在启动 {workers} 个识别工作进程（每个进程 {threads} 个计算线程）...")
+            # 使用spawn启动：在已加载torch/OpenMP线程池或Tk的进程中fork可能导致子进程死锁
+            self._shard_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                                   initializer=_init_shard_worker,
+                                                   initargs=(threads, config.get_all(), self.cpu_precision))
+            self._shard_pool_size = workers
+        return self._shard_pool
+    
+    def _shutdown_shard_pool(self) -> None:
+        """关闭分片识别进程池，释放各进程中的模型副本"""
+        if self._shard_pool is not None:
+            self._shard_pool.shutdown(wait=False)
+            self._shard_pool = None
+            self._shard_pool_size = 0
+    
+    def _realtime_factor_file(self) -> Path:
+        """获取实时率记录文件路径"""
+        log_dir = config.get("log_dir", "logs") or "logs"
+        return Path(log_dir) / "asr_realtime_factor.json"
+    
+    def _realtime_factor_key(self) -> str:
+        """实时率按设备和推理精度分别记录"""
+        if self.device == "cpu" and self.cpu_precision != "fp32":
+            return f"{self.device}-{self.cpu_precision}"
+        return self.device
+    
+    def _load_realtime_factor(self) -> Optional[float]:
+        """读取本机当前设备上测得的识别实时率（处理耗时/语音时长），没有记录时返回None"""
+        try:
+            with open(self._realtime_factor_file(), 'r', encoding='utf-8') as f:
+                return json.load(f).get(self._realtime_factor_key())
+        except Exception:
+            return None
+    
+    def _save_realtime_factor(self, rtf: float) -> None:
+        """按设备保存识别实时率（与历史值做指数平滑）"""
+        rtf_file = self._realtime_factor_file()
+        try:
+            with self._rtf_lock:
+                records: Dict[str, float] = {}
+                if rtf_file.exists():
+                    with open(rtf_file, 'r', encoding='utf-8') as f:
+                        records = json.load(f)
+                key = self._realtime_factor_key()
+                previous = records.get(key)
+                records[key] = rtf if previous is None else 0.7 * previous + 0.3 * rtf
+                rtf_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(rtf_file, 'w', encoding='utf-8') as f:
+                    json.dump(records, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"保存识别实时率失败: {e}")
+    
+    @staticmethod
+    def _format_eta(seconds: float) -> str:
+        """格式化预计时间"""
+        seconds = int(round(seconds))
+        if seconds < 60:
+            return f"约{max(seconds, 1)}秒"
+        if seconds < 3600:
+            return f"约{seconds // 60}分{seconds % 60}秒"
+        return f"约{seconds // 3600}小时{seconds % 3600 // 60}分"
+    
+    @staticmethod
+    def _segment_samples(samples: np.ndarray, segment: List[int], sample_rate: int) -> np.ndarray:
+        """截取语音段为连续数组（每段单独复制，整条音频不复制）"""
+        begin, end = segment
+        return np.ascontiguousarray(samples[int(begin * sample_rate / 1000):int(end * sample_rate / 1000)], dtype=np.float32)
+    
+    @staticmethod
+    def _plan_batches(durations_ms: List[int], batch_size_s: float, in_order: bool = False) -> List[List[int]]:
+        """
+        按时长排序后分批，相近长度的语音段放在同一批以减少补齐
+        
+        Args:
+            durations_ms: 各语音段时长（毫秒）
+            batch_size_s: 每批补齐后的总时长（最长段时长×段数）上限（秒）
+            in_order: 是否保持原顺序（相邻语音段组成一批，用于按时间顺序输出）
+            
+        Returns:
+            批次列表，每批为语音段序号列表
+        """
+        limit_ms = batch_size_s * 1000
+        batches: List[List[int]] = []
+        current: List[int] = []
+        longest = 0
+        order = range(len(durations_ms)) if in_order else sorted(range(len(durations_ms)), key=lambda i: durations_ms[i])
+        for index in order:
+            longest_with_index = max(longest, durations_ms[index])
+            if current and longest_with_index * (len(current) + 1) > limit_ms:
+                batches.append(current)
+                current = []
+                longest_with_index = durations_ms[index]
+            current.append(index)
+            longest = longest_with_index
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _infer_segments(self, inputs: List[np.ndarray], sample_rate: int) -> List[str]:
+        """
+        对一批语音段执行一次识别推理
+        
+        Args:
+            inputs: float32 语音段数组列表
+            sample_rate: 采样率
+            
+        Returns:
+            后处理后的识别文本列表，与inputs顺序一致
+        """
+        if self.model is None:
+            raise Exception("模型未初始化")
+        if self.backend == "onnx":
+            from funasr_onnx.utils.postprocess_utils import rich_transcription_postprocess
+            # funasr_onnx把列表输入当作文件路径读取，数组需逐段传入
+            with self._inference_lock:
+                texts = [self.model(samples, language="auto", textnorm="withitn")[0] for samples in inputs]
+            return [rich_transcription_postprocess(text) for text in texts]
+        
+        from funasr.utils.postprocess_utils import rich_transcription_postprocess
+        with self._inference_lock:
+            outputs = self.model.inference(
+                inputs,
                 cache={},
-                language="auto",  # 自动检测语言
+                language="auto",
                 use_itn=True,
-                batch_size_s=60,
-                merge_vad=True,
-                merge_length_s=15,
+                batch_size=len(inputs),
+                fs=sample_rate,
             )
+        return [rich_transcription_postprocess(output["text"]) for output in outputs]
+    
+    def follow_audio(self, audio_path: str, stop_event: threading.Event,
+                     segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     progress_callback: Optional[Callable[[str, float], None]] = None) -> str:
+        """
+        跟随识别录制中（持续增长）的音频文件：只解码新写入的音频，语音段结束后立即识别并输出
+        
+        Args:
+            audio_path: 录音文件路径
+            stop_event: 录制结束信号，置位后处理剩余音频并返回
+            segment_callback: 每识别完一个语音段时调用，参数为 {"start": 秒, "end": 秒, "text": 文本}
+            progress_callback: 进度回调函数
+            
+        Returns:
+            完整识别结果文本
+        """
+        try:
+            if not self.is_initialized or self.model is None:
+                self.initialize_model(progress_callback)
+                if self.model is None:
+                    raise Exception("模型初始化失败")
+            
+            sample_rate = config.get("audio_sample_rate", 16000) or 16000
+            poll_interval = config.get("follow_poll_interval", 2.0) or 2.0
+            idle_timeout = config.get("follow_idle_timeout", 0) or 0
+            # 语音段结束点距缓冲区末尾不足该时长时，说话可能仍在继续，留到下一轮处理
+            guard_samples = int(1.5 * sample_rate)
+            # 缓冲区短于该时长时不运行VAD，减少重复计算
+            min_pending_samples = int(max(poll_interval, 5.0) * sample_rate)
+            
+            pending = np.zeros(0, dtype=np.float32)
+            pending_start = 0  # pending首样本在文件中的位置
+            read_position = 0
+            last_growth = time.time()
+            texts: List[str] = []
             
             if progress_callback:
-                progress_callback("识别完成", 1.0)
+                progress_callback("正在跟随录音进行识别...", 0.5)
             
-            # 提取并后处理识别结果
-            if result and len(result) > 0:
-                text = rich_transcription_postprocess(result[0]["text"])
-                return text
-            else:
-                return ""
+            while True:
+                appended = audio_processor.read_appended_pcm(audio_path, read_position, sample_rate=sample_rate)
+                if appended.size:
+                    pending = np.concatenate([pending, appended])
+                    read_position += appended.size
+                    last_growth = time.time()
+                
+                finished = stop_event.is_set() or (idle_timeout > 0 and time.time() - last_growth > idle_timeout)
+                if pending.size and (finished or pending.size >= min_pending_samples):
+                    segments = self._run_vad(pending, sample_rate)
+                    limit_ms = pending.size * 1000 // sample_rate if finished else (pending.size - guard_samples) * 1000 // sample_rate
+                    complete = [segment for segment in segments if segment[1] <= limit_ms]
+                    if complete:
+                        for result in self._transcribe_segments(pending, complete, sample_rate):
+                            result["start"] += pending_start / sample_rate
+                            result["end"] += pending_start / sample_rate
+                            if result["text"]:
+                                texts.append(result["text"])
+                                if segment_callback:
+                                    segment_callback(result)
+                        consumed = complete[-1][1] * sample_rate // 1000
+                    elif not segments:
+                        # 整段都是静音，只保留末尾以免截断刚开始的语音
+                        consumed = max(0, pending.size - guard_samples)
+                    else:
+                        consumed = 0
+                    if consumed:
+                        pending = pending[consumed:].copy()
+                        pending_start += consumed
                 
+                if finished:
+                    break
+                stop_event.wait(poll_interval)
+            
+            if progress_callback:
+                progress_callback("识别完成", 1.0)
+            self.last_recognition_stats = {"audio_seconds": read_position / sample_rate}
+            return "".join(texts)
+        
         except Exception as e:
-            print(f"语音识别失败: {e}")
-            raise Exception(f"语音识别失败: {str(e)}")
+            print(f"跟随识别失败: {e}")
+            raise Exception(f"跟随识别失败: {str(e)}")
+    
+    def get_model_revision(self) -> str:
+        """
+        计算模型版本标识（识别模型和VAD模型文件的名称、大小和修改时间），模型更新后缓存的结果自动失效
+        
+        Returns:
+            十六进制版本字符串
+        """
+        if self._model_revision is None:
+            hasher = hashlib.blake2b(digest_size=8)
+            for model_dir in (self.model_dir, self.vad_dir):
+                if not path.isdir(model_dir):
+                    continue
+                for file_name in sorted(os.listdir(model_dir)):
+                    file_path = path.join(model_dir, file_name)
+                    if path.isfile(file_path):
+                        stat = os.stat(file_path)
+                        hasher.update(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+            self._model_revision = hasher.hexdigest()
+        return self._model_revision
+    
+    @staticmethod
+    def _batch_size_s() -> float:
+        """每批补齐后的语音总时长上限（秒），可用 calibrate_asr.py 按本机校准"""
+        return config.get("asr_batch_size_s", 60) or 60
+    
+    @staticmethod
+    def _merge_length_ms() -> int:
+        """相邻VAD语音段合并后的最大时长（毫秒）"""
+        return int((config.get("asr_merge_length_s", 15) or 15) * 1000)
+    
+    @staticmethod
+    def _vad_max_segment_ms() -> int:
+        """VAD单个语音段的最大时长（毫秒），修改后需重新加载模型"""
+        return int(config.get("vad_max_single_segment_time", 30000) or 30000)
+    
+    def _recognition_settings(self) -> Dict[str, Any]:
+        """
+        影响识别结果的参数，用于判断已有识别结果能否复用
+        
+        Returns:
+            参数字典
+        """
+        return {
+            "model_dir": self.model_dir,
+            "model_revision": self.get_model_revision(),
+            "language": "auto",
+            "use_itn": True,
+            "vad_max_single_segment_time": self._vad_max_segment_ms(),
+            "merge_length_ms": self._merge_length_ms(),
+            "normalize": bool(config.get("asr_normalize_audio", False)),
+            "trim_silence": bool(config.get("asr_trim_silence", False)),
+            "trim_min_silence": config.get("asr_trim_min_silence", 2.0),
+            "split_channels": bool(config.get("asr_split_channels", False)),
+            "precision": self.cpu_precision if self.device == "cpu" else "fp32",
+            "backend": self.backend,
+        }
     
     def recognize_audio_batch(self, audio_paths: List[str], progress_callback: Optional[Callable[[str, float], None]] = None) -> List[str]:
         """
-        批量识别音频文件
+        批量识别音频文件：汇总所有文件的VAD语音段，按时长分组后批量推理，再按文件拼回结果
+        
+        Args:
+            audio_paths: 音频文件路径列表
+            progress_callback: 进度回调函数
+            
+        Returns:
+            识别结果文本列表（失败的文件为 "[识别失败: 原因]"）
+        """
+        if self.use_server or config.get("asr_split_channels", False):
+            # 识别服务和分声道模式按文件逐个识别
+            return self._recognize_audio_batch_sequential(audio_paths, progress_callback)
+        
+        sample_rate = config.get("audio_sample_rate", 16000) or 16000
+        settings = self._recognition_settings()
+        total_files = len(audio_paths)
+        errors: Dict[int, str] = {}
+        reused: Dict[int, str] = {}
+        fingerprints: Dict[int, Tuple[np.ndarray, float]] = {}
+        file_texts: Dict[int, List[str]] = {}
+        # 汇总中的语音段及其所属文件的PCM，音频总时长达到上限时先识别并释放，峰值内存与文件数无关
+        pool_seconds = config.get("asr_batch_pool_seconds", 1800) or 1800
+        pool: List[Tuple[int, List[int]]] = []  # (文件序号, [开始毫秒, 结束毫秒])
+        file_samples: Dict[int, np.ndarray] = {}
+        pooled_seconds = 0.0
+        
+        # 逐个文件解码并运行VAD，语音段汇总到一定时长后统一分批推理
+        cache_keys: Dict[int, str] = {}
+        for i, audio_path in enumerate(audio_paths):
+            if pooled_seconds >= pool_seconds:
+                self._transcribe_pool(pool, file_samples, sample_rate, file_texts, errors,
+                                      progress_callback, 0.1 + 0.8 * i / total_files)
+                pool, file_samples, pooled_seconds = [], {}, 0.0
+            try:
+                if progress_callback:
+                    progress_callback(f"正在检测第 {i+1}/{total_files} 个文件的语音段...", 0.1 + 0.8 * i / total_files)
+                if config.get("transcript_cache_enabled", True):
+                    cache_keys[i] = transcript_cache.make_key(audio_processor.file_content_hash(audio_path), settings)
+                    cached_text = transcript_cache.get(cache_keys[i])
+                    if cached_text is not None:
+                        reused[i] = cached_text
+                        continue
+                samples = audio_processor.load_pcm(audio_path, sample_rate=sample_rate, channels=1)
+                if config.get("duplicate_detection_enabled", True):
+                    fingerprint = compute_fingerprint(samples, sample_rate)
+                    duration = samples.shape[0] / sample_rate
+                    match = fingerprint_index.find_match(fingerprint, duration, settings, samples=samples, sample_rate=sample_rate)
+                    if match is not None:
+                        reused[i] = match["transcript"]
+                        continue
+                    fingerprints[i] = (fingerprint, duration)
+                # 全部命中缓存或重复录音时无需加载模型
+                if not self.is_initialized:
+                    self.initialize_model(progress_callback)
+                if config.get("asr_trim_silence", False):
+                    # 与单文件识别相同的静音裁剪，结果与其共用缓存和指纹索引
+                    min_silence = config.get("asr_trim_min_silence", 2.0) or 2.0
+                    samples, _ = audio_processor.trim_silence(samples, sample_rate=sample_rate, min_silence_seconds=min_silence)
+                if config.get("asr_normalize_audio", False):
+                    samples = audio_processor.normalize_pcm(samples, sample_rate=sample_rate, in_place=samples.flags.writeable)
+                segments = self._run_vad(samples, sample_rate)
+                if segments:
+                    pool.extend((i, segment) for segment in segments)
+                    file_samples[i] = samples
+                    pooled_seconds += samples.shape[0] / sample_rate
+            except Exception as e:
+                print(f"识别文件 {audio_path} 失败: {e}")
+                errors[i] = str(e)
+        if pool:
+            self._transcribe_pool(pool, file_samples, sample_rate, file_texts, errors, progress_callback, 0.9)
+            pool, file_samples = [], {}
+        
+        # 按文件拼接各语音段结果
+        results = []
+        for i, audio_path in enumerate(audio_paths):
+            if i in errors:
+                results.append(f"[识别失败: {errors[i]}]")
+            elif i in reused:
+                results.append(reused[i])
+            else:
+                text = "".join(file_texts.get(i, []))
+                if i in fingerprints and text:
+                    fingerprint, duration = fingerprints[i]
+                    fingerprint_index.add(fingerprint, duration, settings, text, source=audio_path)
+                if i in cache_keys:
+                    transcript_cache.put(cache_keys[i], text, source=audio_path)
+                results.append(text)
+        
+        if progress_callback:
+            progress_callback("批量识别完成", 1.0)
+        
+        return results
+    
+    def _transcribe_pool(self, pool: List[Tuple[int, List[int]]], file_samples: Dict[int, np.ndarray], sample_rate: int,
+                         file_texts: Dict[int, List[str]], errors: Dict[int, str],
+                         progress_callback: Optional[Callable[[str, float], None]] = None, progress: float = 0.9,
+                         workers: int = 1) -> None:
+        """
+        对汇总的多个文件（或声道）的语音段按时长分批推理，结果按时间顺序追加到各文件的语音段文本列表
+        
+        Args:
+            pool: (文件序号, [开始毫秒, 结束毫秒]) 列表，同一文件的语音段按时间顺序排列
+            file_samples: 文件序号 -> PCM数组
+            sample_rate: 采样率
+            file_texts: 文件序号 -> 语音段文本列表（输出）
+            errors: 文件序号 -> 失败原因（输出）
+            progress_callback: 进度回调函数
+            progress: 本组识别期间报告的进度
+            workers: 工作进程数，大于1时按时长均衡分片，由多个模型副本并行识别
+        """
+        segment_texts = [""] * len(pool)
+        if workers > 1 and len(pool) > 1:
+            shards = self._balance_shards([end - begin for _, (begin, end) in pool], workers)
+            executor = self._get_shard_pool(len(shards))
+            if progress_callback:
+                progress_callback(f"正在用 {len(shards)} 个进程并行识别 {len(pool)} 个语音段...", progress)
+            futures = {
+                executor.submit(_recognize_shard, [self._segment_samples(file_samples[pool[k][0]], pool[k][1], sample_rate) for k in shard],
+                                sample_rate, self._batch_size_s()): shard
+                for shard in shards
+            }
+            try:
+                for future in as_completed(futures):
+                    for k, text in zip(futures[future], future.result()):
+                        segment_texts[k] = text
+            except Exception as e:
+                # 工作进程异常退出后进程池不可再用，下次重新创建
+                for future in futures:
+                    future.cancel()
+                self._shutdown_shard_pool()
+                raise Exception(f"并行识别失败: {str(e)}")
+            for (i, _), text in zip(pool, segment_texts):
+                file_texts.setdefault(i, []).append(text)
+            return
+        
+        batches = self._plan_batches([end - begin for _, (begin, end) in pool], self._batch_size_s())
+        for n, batch in enumerate(batches):
+            if progress_callback:
+                progress_callback(f"正在批量识别（第 {n+1}/{len(batches)} 批）...", progress)
+            inputs = [self._segment_samples(file_samples[pool[k][0]], pool[k][1], sample_rate) for k in batch]
+            try:
+                texts = self._infer_segments(inputs, sample_rate)
+            except Exception as e:
+                # 整批失败时逐段重试，只让出错的文件失败
+                print(f"批量识别失败，改为逐段识别: {e}")
+                texts = []
+                for k, segment_input in zip(batch, inputs):
+                    try:
+                        texts.append(self._infer_segments([segment_input], sample_rate)[0])
+                    except Exception as segment_error:
+                        errors.setdefault(pool[k][0], str(segment_error))
+                        texts.append("")
+            for k, text in zip(batch, texts):
+                segment_texts[k] = text
+        
+        for (i, _), text in zip(pool, segment_texts):
+            file_texts.setdefault(i, []).append(text)
+    
+    def _recognize_audio_batch_sequential(self, audio_paths: List[str], progress_callback: Optional[Callable[[str, float], None]] = None) -> List[str]:
+        """
+        逐个文件识别（识别服务和分声道模式使用）
         
         Args:
             audio_paths: 音频文件路径列表
@@ -137,7 +1345,7 @@ class SpeechRecognizer:
         Returns:
             识别结果文本列表
         """
-        if not self.is_initialized:
+        if not self.is_initialized and not self.use_server:
             self.initialize_model(progress_callback)
         
         results = []
@@ -168,23 +1376,55 @@ class SpeechRecognizer:
         Returns:
             模型信息字典
         """
+        if self.use_server and not self._device_detected:
+            # 客户端模式不导入PyTorch，设备等信息以识别服务为准
+            info = self._remote_model_info()
+            if info is not None:
+                return dict(info, server_mode=True)
+            self._detect_device()
         return {
             "model_name": "iic/SenseVoiceSmall",
+            "backend": self.backend,
             "device": self.device,
             "is_initialized": self.is_initialized,
-            "cuda_available": torch.cuda.is_available(),
-            "gpu_enabled": config.get("use_gpu", True)
+            "cuda_available": self.cuda_available,
+            "gpu_enabled": config.get("use_gpu", True),
+            "last_trim_ratio": self.last_recognition_stats.get("trim_ratio", 0.0),
+            "warmup_state": self.warmup_state,
+            "warmup_error": self.warmup_error,
+            "server_mode": self.use_server,
+            "realtime_factor": self._load_realtime_factor(),
+            "precision": self.cpu_precision if self.device == "cpu" else "fp32"
         }
     
+    def _remote_model_info(self) -> Optional[Dict[str, Any]]:
+        """从常驻识别服务获取模型信息，无法连接时返回None"""
+        try:
+            conn = connect_to_server()
+        except Exception:
+            return None
+        try:
+            conn.send({"command": "info"})
+            message = conn.recv()
+            return message.get("info") if message.get("type") == "result" else None
+        except (OSError, EOFError):
+            return None
+        finally:
+            conn.close()
+    
     def cleanup(self) -> None:
         """清理模型资源"""
+        self._shutdown_shard_pool()
         if self.model is not None:
             try:
                 # 释放GPU内存
                 if self.device == "cuda":
+                    import torch
                     torch.cuda.empty_cache()
                 self.model = None
+                self.vad_model = None
                 self.is_initialized = False
+                self.warmup_state = "idle"
                 print("语音识别模型已清理")
             except Exception as e:
                 print(f"清理模型失败: {e}")
@@ -0,0 +1,211 @@
+"""
+临时工作区模块 - 会议纪要生成神器
+为每个处理任务分配独立的临时目录，限制总占用空间并清理崩溃遗留的目录
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Set, Union
+
+from config import config
+
+OWNER_FILE = ".owner"
+
+def _pid_alive(pid: int) -> bool:
+    """判断进程是否仍在运行"""
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        # Windows下os.kill会直接结束进程，改用OpenProcess查询
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+class TempWorkspace:
+    """临时工作区管理类"""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        初始化临时工作区
+
+        Args:
+            root: 临时文件根目录，如果为None则使用配置文件中的设置
+        """
+        temp_dir_str = root if root is not None else config.get("temp_dir", "temp")
+        if temp_dir_str is None:
+            temp_dir_str = "temp"
+        self.root = Path(temp_dir_str)
+        self.jobs_dir = self.root / "jobs"
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        max_bytes = config.get("temp_max_bytes", 5 * 1024 * 1024 * 1024)
+        self.max_bytes = max_bytes if max_bytes is not None else 5 * 1024 * 1024 * 1024
+
+        self._lock = threading.Lock()
+        self._session_jobs: Set[Path] = set()
+        self._active_jobs: Set[Path] = set()
+
+        # 启动时清理崩溃或异常退出遗留的任务目录
+        self.cleanup_orphans()
+
+    def create_job(self, prefix: str = "job") -> Path:
+        """
+        创建任务目录（创建后处于使用中状态，不会被淘汰）
+
+        Args:
+            prefix: 目录名前缀，用于区分任务类型
+
+        Returns:
+            任务目录路径
+        """
+        job_name = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        job_dir = self.jobs_dir / job_name
+        job_dir.mkdir(parents=True)
+        (job_dir / OWNER_FILE).write_text(str(os.getpid()), encoding='utf-8')
+
+        with self._lock:
+            self._session_jobs.add(job_dir)
+            self._active_jobs.add(job_dir)
+
+        self.enforce_budget()
+        return job_dir
+
+    def job_of(self, path: Union[str, Path]) -> Optional[Path]:
+        """
+        查找文件所属的任务目录
+
+        Args:
+            path: 任务目录或其中的文件路径
+
+        Returns:
+            任务目录路径，不属于任何任务时返回None
+        """
+        try:
+            relative = Path(path).resolve().relative_to(self.jobs_dir.resolve())
+        except ValueError:
+            return None
+        if not relative.parts:
+            return None
+        return self.jobs_dir / relative.parts[0]
+
+    def release_job(self, path: Union[str, Path], remove: bool = False) -> None:
+        """
+        释放任务目录：不再使用的任务可被淘汰，或直接删除
+
+        Args:
+            path: 任务目录或其中的文件路径
+            remove: 是否立即删除
+        """
+        job_dir = self.job_of(path)
+        if job_dir is None:
+            return
+        with self._lock:
+            self._active_jobs.discard(job_dir)
+            if remove:
+                self._session_jobs.discard(job_dir)
+        if remove:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return
+        try:
+            # 以释放时间作为最近使用时间，淘汰时先删除最早释放的任务
+            os.utime(job_dir / OWNER_FILE)
+        except OSError:
+            pass
+
+    def enforce_budget(self) -> None:
+        """总占用超过上限时，按最近使用时间（文件修改或任务释放时间）淘汰已释放的任务目录"""
+        jobs = []
+        total_bytes = 0
+        for job_dir in self.jobs_dir.iterdir():
+            if not job_dir.is_dir():
+                continue
+            size, last_used = self._measure(job_dir)
+            total_bytes += size
+            jobs.append((last_used, size, job_dir))
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        with self._lock:
+            active_jobs = set(self._active_jobs)
+        for _, size, job_dir in sorted(jobs, key=lambda job: job[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            if job_dir in active_jobs or self._owned_by_other_process(job_dir):
+                continue
+            shutil.rmtree(job_dir, ignore_errors=True)
+            with self._lock:
+                self._session_jobs.discard(job_dir)
+            total_bytes -= size
+
+        if total_bytes > self.max_bytes:
+            print(f"临时目录占用 {total_bytes / (1024*1024):.0f}MB，超过上限但剩余任务仍在使用中")
+
+    def cleanup_orphans(self) -> None:
+        """清理所属进程已不存在的任务目录"""
+        for job_dir in self.jobs_dir.iterdir():
+            if not job_dir.is_dir():
+                continue
+            owner_pid = self._owner_pid(job_dir)
+            if owner_pid == os.getpid() or (owner_pid is not None and _pid_alive(owner_pid)):
+                continue
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def cleanup_session(self) -> None:
+        """删除本进程创建的全部任务目录"""
+        with self._lock:
+            session_jobs = list(self._session_jobs)
+            self._session_jobs.clear()
+            self._active_jobs.clear()
+        for job_dir in session_jobs:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _owner_pid(self, job_dir: Path) -> Optional[int]:
+        """读取任务目录所属进程ID"""
+        try:
+            return int((job_dir / OWNER_FILE).read_text(encoding='utf-8').strip())
+        except (OSError, ValueError):
+            return None
+
+    def _owned_by_other_process(self, job_dir: Path) -> bool:
+        """任务目录是否属于其他仍在运行的进程"""
+        owner_pid = self._owner_pid(job_dir)
+        return owner_pid is not None and owner_pid != os.getpid() and _pid_alive(owner_pid)
+
+    def _measure(self, job_dir: Path):
+        """统计目录大小和最近修改时间"""
+        size = 0
+        last_used = 0.0
+        for dir_path, _, file_names in os.walk(job_dir):
+            for file_name in file_names:
+                try:
+                    stat = os.stat(os.path.join(dir_path, file_name))
+                except OSError:
+                    continue
+                size += stat.st_size
+                last_used = max(last_used, stat.st_mtime)
+        return size, last_used
+
+# 全局临时工作区实例
+temp_workspace = TempWorkspace()
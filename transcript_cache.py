@@ -0,0 +1,112 @@
+"""
+识别结果缓存模块 - 会议纪要生成神器
+按音频内容哈希和识别参数缓存识别结果，重新上传或重启程序后可直接复用
+"""
+
+import json
+import hashlib
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from config import config
+
+class TranscriptCache:
+    """识别结果缓存类"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        初始化识别结果缓存
+
+        Args:
+            cache_dir: 缓存目录，如果为None则使用日志目录下的transcript_cache
+        """
+        config_log_dir = config.get("log_dir", "logs")
+        if config_log_dir is None:
+            config_log_dir = "logs"
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else Path(config_log_dir) / "transcript_cache"
+
+        max_bytes = config.get("transcript_cache_max_bytes", 200 * 1024 * 1024)
+        self.max_bytes = max_bytes if max_bytes is not None else 200 * 1024 * 1024
+
+        self._lock = threading.Lock()
+
+    def make_key(self, content_hash: str, settings: Dict[str, Any]) -> str:
+        """
+        生成缓存键
+
+        Args:
+            content_hash: 音频文件内容哈希
+            settings: 影响识别结果的参数（模型版本、语言、VAD参数等）
+
+        Returns:
+            缓存键
+        """
+        payload = json.dumps({"audio": content_hash, "settings": settings}, sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的识别结果（命中时刷新最近使用时间）
+
+        Args:
+            key: make_key生成的缓存键
+
+        Returns:
+            识别结果文本，未命中时返回None
+        """
+        cache_file = self.cache_dir / f"{key}.json"
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(cache_file)
+            return entry["text"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"读取识别结果缓存失败: {e}")
+            return None
+
+    def put(self, key: str, text: str, source: Optional[str] = None) -> None:
+        """
+        写入识别结果，超出容量时按最近使用时间淘汰
+
+        Args:
+            key: make_key生成的缓存键
+            text: 识别结果文本
+            source: 来源文件路径（仅用于排查）
+        """
+        try:
+            with self._lock:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                cache_file = self.cache_dir / f"{key}.json"
+                partial_file = self.cache_dir / f"{key}.partial"
+                with open(partial_file, 'w', encoding='utf-8') as f:
+                    json.dump({"text": text, "source": source, "timestamp": datetime.now().isoformat()}, f, ensure_ascii=False)
+                os.replace(partial_file, cache_file)
+                self._evict(keep=cache_file)
+        except Exception as e:
+            print(f"保存识别结果缓存失败: {e}")
+
+    def _evict(self, keep: Optional[Path] = None) -> None:
+        """按修改时间淘汰最久未使用的缓存，直到总大小不超过上限"""
+        entries = []
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                stat = cache_file.stat()
+                entries.append((stat.st_mtime, stat.st_size, cache_file))
+            except OSError:
+                continue
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, cache_file in sorted(entries, key=lambda entry: entry[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            if keep is not None and cache_file == keep:
+                continue
+            cache_file.unlink(missing_ok=True)
+            total_bytes -= size
+
+# 全局识别结果缓存实例
+transcript_cache = TranscriptCache()